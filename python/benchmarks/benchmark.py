@@ -0,0 +1,105 @@
+import sys, os
+import json
+import time
+import argparse
+import platform
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)),'..','src'))
+from DPML import *
+from DPML_Converter import *
+from corpus import *
+
+# Minimum and mean time of repeated function calls
+def measure(fn, repeat, number=1):
+    times = []
+    for r in range(repeat):
+        start = time.perf_counter()
+        for n in range(number):
+            fn()
+        times.append((time.perf_counter()-start)/number)
+    return {'min': min(times), 'mean': sum(times)/len(times), 'repeat': repeat, 'number': number}
+
+def initialize(filepath):
+    DPML_Files.invalidate()
+    with DPML() as p:
+        p.load(filepath)
+        p.initialize()
+    return p
+
+# Code of a single table with the configured number of rows
+def table_code(size):
+    size = dict(size, nodes=0, imports=0, tables=1)
+    code, _ = document(size)
+    with DPML() as p:
+        code, line = next(p._read_statements(code.split("\n")))
+    return code
+
+# Run all benchmarks on a corpus of a given size
+def run(size=None, repeat=5, seed=0):
+    size = dict(SIZE, **(size or {}))
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        filepath, names = corpus(directory, size, seed)
+        results['initialize'] = measure(lambda: initialize(filepath), repeat)
+        doc = initialize(filepath)
+        names = names[:10] or [doc.nodes.names()[0]]
+        # expressions of node values with units
+        expr = " && ".join(f"({{?{name}}} >= 0 {doc.nodes[name].units} || false)" for name in names)
+        results['expression'] = measure(lambda: doc.expression(expr), repeat, 10)
+        # unit conversions of scalars and arrays
+        with DPML_Converter() as conv:
+            array = np.linspace(0, 1, size['length'])
+            results['convert_scalar'] = measure(lambda: conv.convert(1.0, 'km/h', 'm/s'), repeat, 1000)
+            results['convert_array'] = measure(lambda: conv.convert(array, 'km/h', 'm/s'), repeat, 100)
+        # table parsing
+        lexer = DPML_Lexer('benchmark')
+        code = table_code(size)
+        results['table'] = measure(lambda: lexer.node(code, 1).parse(DPML_NodeStore(), []), repeat, 10)
+        # queries of subtrees, single segments and single nodes
+        results['query_subtree'] = measure(lambda: doc.query('block0.*'), repeat, 100)
+        results['query_segment'] = measure(lambda: doc.query('block0.*.level2.n0'), repeat, 100)
+        results['query_node'] = measure(lambda: doc.query(names[0]), repeat, 100)
+        # templates
+        template = "\n".join(f"{name} = {{{{?{name}}}:.3e}}" for name in names)
+        results['template'] = measure(lambda: doc.template(template), repeat, 10)
+    return results
+
+# Ratios of minimal times of new and old results
+def compare(old, new):
+    ratios = {}
+    for name, result in new['results'].items():
+        if name in old['results']:
+            ratios[name] = result['min']/old['results'][name]['min']
+    return ratios
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark DPML on a synthetic corpus")
+    for key, value in SIZE.items():
+        parser.add_argument('--'+key, type=type(value), default=value)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="JSON file with results, printed if not given")
+    parser.add_argument('--compare', help="JSON file with previous results")
+    args = parser.parse_args(argv)
+    size = {key: getattr(args, key) for key in SIZE}
+    data = {
+        'time':     time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python':   platform.python_version(),
+        'numpy':    np.__version__,
+        'machine':  platform.machine(),
+        'size':     size,
+        'results':  run(size, args.repeat, args.seed),
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            data['ratios'] = compare(json.load(f), data)
+    if args.output:
+        with open(args.output,'w') as f:
+            json.dump(data, f, indent=2)
+    else:
+        print(json.dumps(data, indent=2))
+
+if __name__ == "__main__":
+    main()
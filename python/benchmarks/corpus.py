@@ -0,0 +1,87 @@
+import os
+import random
+
+# Units used by unit-heavy values
+UNITS = ['m', 'cm', 'km', 'g', 'kg', 's', 'ms', 'm/s', 'kg*m/s2', 'J', 'W/m2', 'g/cm3']
+
+# Default size of a synthetic document
+SIZE = {
+    'nodes':   1000,   # number of value nodes
+    'depth':   3,      # nesting depth of groups
+    'width':   10,     # number of nodes in the deepest group
+    'cases':   0.1,    # fraction of nodes defined in @case conditions
+    'units':   0.5,    # fraction of float values with units
+    'arrays':  0.05,   # fraction of array nodes
+    'length':  100,    # length of arrays
+    'tables':  2,      # number of tables
+    'rows':    100,    # number of table rows
+    'imports': 4,      # number of imported files
+}
+
+# Code of a synthetic document, returns the code and names of numerical nodes with units
+def document(size=None, imports=[], seed=0):
+    size = dict(SIZE, **(size or {}))
+    rnd = random.Random(seed)
+    lines, names = [], []
+    for i, path in enumerate(imports):
+        lines.append(f"import{i} {{{path}}}")
+    count, block = 0, 0
+    while count<size['nodes']:
+        # nested groups
+        parents = [f"block{block}"]
+        lines.append(parents[0])
+        for d in range(1, size['depth']):
+            parents.append(f"level{d}")
+            lines.append("  "*d + parents[-1])
+        indent = "  "*size['depth']
+        prefix = ".".join(parents) + "."
+        scalar = None   # last scalar node that conditions can test
+        for n in range(min(size['width'], size['nodes']-count)):
+            name = f"n{n}"
+            r = rnd.random()
+            if scalar and r<size['cases']:
+                lines += [
+                    f"{indent}@case {{?{prefix}{scalar}}} > {rnd.randint(0,100)}",
+                    f"{indent}  {name} int = 1",
+                    f"{indent}@else",
+                    f"{indent}  {name} int = 2",
+                    f"{indent}@end",
+                ]
+            elif r<size['cases']+size['arrays']:
+                values = ",".join(str(rnd.randint(0,1000)) for i in range(size['length']))
+                lines.append(f"{indent}{name} float[:] = [{values}] {rnd.choice(UNITS)}")
+            elif r<size['cases']+size['arrays']+size['units']:
+                lines.append(f"{indent}{name} float = {rnd.uniform(0,100):.4f} {rnd.choice(UNITS)}")
+                names.append(prefix+name)
+                scalar = name
+            else:
+                lines.append(f"{indent}{name} int = {rnd.randint(0,100)}")
+                scalar = name
+            count += 1
+        block += 1
+    for t in range(size['tables']):
+        lines += [f'table{t} table = """', "time float s", "step int", "mass float kg", ""]
+        for r in range(size['rows']):
+            lines.append(f"{rnd.uniform(0,10):.3f} {r} {rnd.uniform(0,1):.5f}")
+        lines.append('"""')
+    return "\n".join(lines), names
+
+# Write a main file importing a number of smaller files that share a common import
+def corpus(directory, size=None, seed=0):
+    size = dict(SIZE, **(size or {}))
+    common = os.path.join(directory, 'common.dpml')
+    code, _ = document(dict(size, nodes=max(1, size['nodes']//10), tables=0), seed=seed)
+    with open(common, 'w') as f:
+        f.write(code)
+    imports = []
+    for i in range(size['imports']):
+        filepath = os.path.join(directory, f'import{i}.dpml')
+        code, _ = document(dict(size, nodes=max(1, size['nodes']//10), tables=0), [common], seed=seed+i+1)
+        with open(filepath, 'w') as f:
+            f.write(code)
+        imports.append(filepath)
+    filepath = os.path.join(directory, 'main.dpml')
+    code, names = document(size, imports, seed=seed)
+    with open(filepath, 'w') as f:
+        f.write(code)
+    return filepath, names
@@ -2,15 +2,26 @@ import numpy as np
 import re
 import os
 from typing import List
-from math import isclose
+from collections import deque
+from itertools import chain
 
 from DPML_Node import *
+from DPML_Lexer import *
 from DPML_Parser import *
+from DPML_NodeStore import *
+from DPML_Expression import *
+from DPML_Template import *
+from DPML_Cache import *
+from DPML_Compiled import *
+from DPML_Batch import *
+from DPML_Incremental import *
+from DPML_Imports import *
+from DPML_Profiler import *
 from DPML_Settings import *
 
 class DPML:
     lines: str
-    nodes: List = []
+    nodes: DPML_NodeStore
     units: List = []
     source: str = 'inline'
     
@@ -19,6 +30,14 @@ class DPML:
             self.lines = code.split('\n')
         else:
             self.lines = []
+        self.inline = bool(code)
+        self.files = []          # loaded files
+        self.depends = {}        # stamps of all files read during initialization
+        self.nodes = DPML_NodeStore()
+        self.units = []
+        self.incremental = None
+        self.nested = None
+        self.report = None       # profile of the last initialization
     
     def __enter__(self):
         return self
@@ -26,44 +45,118 @@ class DPML:
     def __exit__(self, type, value, traceback):
         pass
 
-    # Prepare raw nodes
-    def initialize(self):
-        # Convert code lines to nodes
+    # Group code lines into statements
+    def _read_statements(self, lines):
         l = 0
-        nodes = []
-        cname, cnum = [''], [0]
-        indents, parents = [-1], []
-        while len(self.lines)>0:
-            l, line = l+1, self.lines.pop(0)
-            node = DPML_Node(
-                code = line,
-                line = l,
-                source = self.source,
-            )
+        lines = iter(lines)
+        for line in lines:
+            l += 1
+            code, start = line, l
             # Group block structures
-            if '"""' in node.code:
+            if '"""' in code:
                 block = []
-                while len(self.lines)>0:
-                    l, subline = l+1, self.lines.pop(0)
+                for subline in lines:
+                    l += 1
                     if '"""' in subline:
-                        node.code += "\n".join(block) + subline.lstrip()
+                        code += "\n".join(block) + subline.lstrip()
                         break
                     else:
                         block.append( subline )
                 else:
-                    raise Exception("Block structure starting on line %d is not properly terminated."%node.line)
-            node = node.determine_type()
-            nodes.append(node)
-        self.nodes = nodes
-        # Parse nodes
-        nodes, units = [], []
-        while len(self.nodes)>0:
-            node = self.nodes.pop(0)
+                    raise Exception("Block structure starting on line %d is not properly terminated."%start)
+            yield code, start
+
+    # Convert code lines to nodes
+    def _read_nodes(self, lines):
+        lexer = DPML_Lexer(self.source)
+        report = DPML_Profile.report
+        node = lexer.node if report is None else report.wrap('lexing', lexer.node)
+        for code, start in self._read_statements(lines):
+            yield node(code, start)
+
+    # Prepare raw nodes
+    # Incremental initialization records dependencies of all statements for later updates
+    # Profiling records times of parsing phases into a report stored in self.report
+    # Compiled files are used only on request, because they are loaded with pickle
+    def initialize(self, incremental=False, profile=False, compiled=False):
+        if profile:
+            with DPML_Profile.record(DPML_Report()) as self.report:
+                self.initialize(incremental=incremental, compiled=compiled)
+            return
+        # Use compiled nodes if nothing changed since the last compilation
+        if compiled and len(self.files)==1 and not self.inline and not incremental:
+            compiled = DPML_Compiled(self.files[0]).load()
+            if compiled:
+                self.lines = []
+                nodes, self.units, self.depends = compiled
+                self.nodes = DPML_NodeStore(nodes)
+                DPML_Files._depend(self.depends)
+                return
+        lines, self.lines = self.lines, []
+        depends = self._stamps()
+        with DPML_Files.track(depends), DPML_Files.parsing_files(self.files):
+            if incremental:
+                self.incremental = DPML_Incremental(self)
+                context = self.incremental.update(list(self._read_statements(lines)))
+            else:
+                context = DPML_Context()
+                for node in self._read_nodes(lines):
+                    self._statement(node, context)
+        self.nodes = context.nodes
+        self.units = context.units
+        self.depends = depends
+
+    # Re-initialize only statements affected by changes of the code, files or node values
+    # Values set by the user replace values of node definitions
+    def update(self, code=None, values=None):
+        if self.incremental is None:
+            raise Exception("Nodes were not initialized incrementally")
+        changed = self.incremental.override(values or {})
+        if code is not None:     # code was changed
+            self.inline, self.files = True, []
+            statements = list(self._read_statements(code.split('\n')))
+        elif not self.inline:    # files could be changed
+            lines = []
+            for filepath in self.files:
+                with open(filepath,'r') as f:
+                    lines += f.read().split('\n')
+            statements = list(self._read_statements(lines))
+        else:
+            statements = [(stmt.code, stmt.line) for stmt in self.incremental.statements]
+        depends = self._stamps()
+        with DPML_Files.track(depends), DPML_Files.parsing_files(self.files):
+            context = self.incremental.update(statements, changed)
+        self.nodes = context.nodes
+        self.units = context.units
+        self.depends = depends
+
+    # Stamps of the loaded files
+    def _stamps(self):
+        depends = {}
+        for filepath in self.files:
+            path = os.path.abspath(filepath)
+            depends[path] = DPML_Files.stamp(path)
+        return depends
+
+    # Process a single statement
+    def _statement(self, node, context):
+        nodes, units = context.nodes, context.units
+        cname, cnum = context.cname, context.cnum
+        indents, parents = context.indents, context.parents
+        report = DPML_Profile.report
+        # Nodes produced by imports and tables are spliced in front of the queue
+        queue = deque([node])
+        while queue:
+            node = queue.popleft()
             # Perform specific node parsing
-            parsed = node.parse(nodes, units)
+            if report is None:
+                parsed = node.parse(nodes, units)
+            else:
+                phase = PARSE_PHASES.get(node.keyword, 'parse')
+                parsed = report.wrap(phase, node.parse, node)(nodes, units)
             if parsed: 
                 # Add parsed nodes to the queue and continue
-                self.nodes = parsed + self.nodes
+                queue.extendleft(reversed(parsed))
                 continue
             # Create hierarchical name
             if node.name is not None:
@@ -75,7 +168,10 @@ class DPML:
                  node.name = SGN_SEPARATOR.join(parents)
             # Add nodes to the list
             if node.keyword=='option':        # Set node option
-                nodes[-1].set_option(node, units)
+                if report is None:
+                    nodes.last().set_option(node, units)
+                else:
+                    report.wrap('options', nodes.last().set_option, node)(node, units)
             elif node.keyword in ['empty','group','unit']:
                 continue
             elif node.keyword=='condition':   # Parse conditions
@@ -108,49 +204,76 @@ class DPML:
                         SGN_CASE + KWD_ELSE + SGN_SEPARATOR,''
                     )
                 # Set the node value
-                node.set_value()
+                if report is None:
+                    node.set_value()
+                else:
+                    report.wrap('cast', node.set_value, node)()
                 # If node was previously defined, modify its value
-                for n in range(len(nodes)):
-                    if nodes[n].name==node.name:
-                        nodes[n].modify_value(node, units)
-                        break
+                if node.name in nodes:
+                    if report is None:
+                        nodes[node.name].modify_value(node, units)
+                    else:
+                        report.wrap('modify', nodes[node.name].modify_value, node)(node, units)
                 # If node wasn't defined, create a new node
                 else:
                     if node.keyword=='mod':
                         raise Exception(f"Modifying undefined node:",node.name)
+                    if node.name in context.overrides:
+                        value = context.overrides[node.name]
+                        if isinstance(value, np.ndarray):
+                            value = value.copy()   # arrays of the user are not converted in place
+                        node.value, node.value_raw = None, value
+                        node.set_value()
                     nodes.append(node)
-        self.nodes = nodes
-        self.units = units
         
     # Read DPML code from a file
-    def load(self, filepath):
+    # In the streaming mode lines are read lazily only when nodes are initialized
+    def load(self, filepath, stream=False):
         self.source = filepath
+        self.files.append(filepath)
+        if stream:
+            self.lines = chain(self.lines, self._stream(filepath))
+        else:
+            with open(filepath,'r') as f:
+                lines = f.read().split('\n')
+            if isinstance(self.lines, list):
+                self.lines += lines
+            else:
+                self.lines = chain(self.lines, lines)
+
+    # Read file line by line without line endings
+    def _stream(self, filepath):
         with open(filepath,'r') as f:
-            self.lines += f.read().split('\n')
+            for line in f:
+                yield line.rstrip('\n')
+
+    # Save initialized nodes into a compiled file next to the source file
+    def compile(self):
+        if len(self.files)!=1 or self.inline:
+            raise Exception("Only nodes loaded from a single file can be compiled:", self.files)
+        DPML_Compiled(self.files[0]).save(self.nodes, self.units, self.depends)
 
     # Use specific nodes and units
     def use(self, nodes, units):
+        if not isinstance(nodes, DPML_NodeStore):
+            nodes = DPML_NodeStore(nodes)
         self.nodes = nodes
         self.units = units
         
     # Select local nodes according to a query
+    # Names of selected nodes are relative to the part of the query before the first wildcard
     def query(self, query):
         nodes = []
-        if query==SGN_WILDCARD:
-            return self.nodes
-        elif query[-2:]==SGN_SEPARATOR + SGN_WILDCARD:
-            for node in self.nodes:
-                if node.name.startswith(query[:-1]):
-                    node = node.copy()
-                    node.name = node.name[len(query[:-1]):]
-                    nodes.append(node)
-        else:
-            for node in self.nodes:
-                if node.name==query:
-                    node = node.copy()
-                    node.name = node.name.split(SGN_SEPARATOR)[-1]
-                    nodes.append(node)
-        return nodes        
+        if SGN_WILDCARD in query:
+            strip = query.index(SGN_WILDCARD)
+        for node in self.nodes.select(query):
+            node = node.view()
+            if SGN_WILDCARD in query:
+                node.name = node.name[strip:]
+            else:
+                node.name = node.name.split(SGN_SEPARATOR)[-1]
+            nodes.append(node)
+        return nodes
 
     # Request nodes from a path
     def request(self, path, count=None):
@@ -158,11 +281,8 @@ class DPML:
             filename,query = path.split(SGN_QUERY)
         else:
             filename,query = path,SGN_WILDCARD
-        if filename:  # open external file and parse the values
-            with DPML() as p:
-                p.load(filename)
-                p.initialize()
-            nodes = p.query(query)
+        if filename:  # use cached values parsed from an external file
+            nodes = DPML_Files.query(filename, query)
         else:         # use values parsed in the current file
             if not self.nodes:
                 raise Exception(f"Local nodes are not available for DPML import:", path)
@@ -181,145 +301,39 @@ class DPML:
             node.value_raw = nodes[0].value_raw
             if not node.units:
                 node.units = nodes[0].units
+        elif os.path.splitext(path)[1] in [EXT_NUMPY]+EXT_RAW:
+            DPML_Files.depend(path)
+            node.value = self._memmap(node, path)
         else:
+            DPML_Files.depend(path)
             with open(path,'r') as f:
                 node.value_raw = f.read()
         return node
+
+    # Map binary array file into memory without reading it
+    def _memmap(self, node, path):
+        if os.path.splitext(path)[1]==EXT_NUMPY:
+            return np.load(path, mmap_mode='r')
+        if not node.dimension:
+            raise Exception("Raw binary file requires node dimensions:", path)
+        dtype = np.dtype(node.dtype)
+        # shape is given by fixed dimensions, one open dimension is given by the file size
+        shape = [dim[0] if dim[0] is not None and dim[0]==dim[1] else -1 for dim in node.dimension]
+        if shape.count(-1)>1:
+            raise Exception("Raw binary file can have only one open dimension:", path)
+        if -1 in shape:
+            size = int(np.prod([s for s in shape if s!=-1]))*dtype.itemsize
+            shape[shape.index(-1)] = os.path.getsize(path)//size if size else 0
+        if int(np.prod(shape))*dtype.itemsize!=os.path.getsize(path):
+            raise Exception("Raw binary file size does not match node dimensions:", path)
+        return np.memmap(path, dtype=dtype, mode='r', shape=tuple(shape))
     
-    def _eval_node(self, expr):
-        expr = expr.strip()
-        if expr=='':
-            return None
-        flags = []
-        if expr[0]==SGN_NEGATE:
-            flags.append('negate')
-            expr = expr[1:]
-        if expr[0]==SGN_DEFINED:
-            flags.append('defined')
-            expr = expr[1:]
-        # parse node from the code
-        kwargs = {'code': expr, 'line':0, 'source': 'expression'}
-        p = DPML_Parser(keyword='node',**kwargs)
-        p.get_value(equal_sign=False)
-        if p.isimport:   # import existing node
-            nodes = self.request(p.value, count=[0,1])
-            if len(nodes)==1:
-                if 'defined' in flags:
-                    node = DPML_Type_Boolean(value_raw=KWD_TRUE,value=True,**kwargs)
-                else:
-                    node = nodes[0]
-            elif len(nodes)==0:
-                if 'defined' in flags:
-                    node = DPML_Type_Boolean(value_raw=KWD_FALSE,value=False,**kwargs)
-                else:
-                    node = None
-        elif p.value==KWD_TRUE:
-            node = DPML_Type_Boolean(value_raw=KWD_TRUE,value=True,**kwargs)
-        elif p.value==KWD_FALSE:
-            node = DPML_Type_Boolean(value_raw=KWD_FALSE,value=False,**kwargs)
-        else:            # create anonymous node
-            p.get_units()
-            node = DPML_Type(p)
-            node.set_value()
-        if 'negate' in flags:
-            if node.keyword=='bool':
-                node.value = not node.value
-                node.value_raw = KWD_TRUE if node.value else KWD_FALSE
-            else:
-                raise Exception(f"Negated node is not boolean but:", node.keyword)
-        return node
-    def _eval_comparison(self, expr):
-        # return immediatelly if expression is a boolean
-        if isinstance(expr,(bool,np.bool_)):
-            return expr
-        expr = expr.strip()
-        # list of comparison opperators
-        comps = [
-            # neglect python rounding errors using 'isclose' function
-            ('==', lambda a,b: isclose(a, b, rel_tol=EQUAL_PRECISION)),  
-            ('!=', lambda a,b: a!=b),
-            ('>=', lambda a,b: (a>b)|isclose(a, b, rel_tol=EQUAL_PRECISION)),
-            ('<=', lambda a,b: (a<b)|isclose(a, b, rel_tol=EQUAL_PRECISION)),
-            ('>',  lambda a,b: a>b ),
-            ('<',  lambda a,b: a<b ),
-        ]
-        # evaluate pair comparisions
-        for sign,fn in comps:
-            if sign not in expr:
-                continue
-            # parse left and right nodes
-            left,right = expr.split(sign)
-            left,right = self._eval_node(left),self._eval_node(right)
-            if not left or not right:
-                raise Exception("Couldn't find all requested nodes:", expr)
-            # perform comparison
-            if left.keyword=='node':            # if left node datatype is unknown
-                left.set_value(left.cast_value(right))
-                left.convert_units(right, self.units)
-                right.set_value()
-                return fn(left.value, right.value)
-            elif right.keyword=='node':         # if right node datatype is unknown
-                left.set_value()
-                right.set_value(right.cast_value(left))
-                right.convert_units(left, self.units)
-                return fn(left.value, right.value)
-            elif left.keyword==right.keyword:   # if both datatypes are known
-                left.set_value()
-                right.set_value()
-                right.convert_units(left, self.units)
-                return fn(left.value, right.value)                
-            else:                               # throw error if both datatypes are unknown
-                raise Exception("Invalid comparison:", expr)
-        # evaluate single comparisons
-        node = self._eval_node(expr)
-        node.set_value()
-        if node.keyword=='bool':
-            return node.value
-        else:
-            raise Exception("Single node expression needs to be a boolean:", expr)
+    # Evaluate a condition using its compiled form
     def expression(self, expr):
-        expr = expr.strip()
         # immediately return boolean values
         if isinstance(expr,(bool,np.bool_)):
             return expr
-        # check if parenthesis are properly terminated
-        elif expr.count('(')!=expr.count(')'):
-            raise Exception('Unterminated parenthesis in expression:', expr)
-        # evaluate logical && and || and parenthesis
-        ors, ands, buff = [], [], ''
-        while expr:
-            sign, expr = expr[0], expr[1:]
-            if sign=='(': # evaluate content of parenthesis separately
-                p = 1
-                while p>0 and expr:
-                    sign, expr = expr[0], expr[1:]
-                    if sign=='(':   p += 1
-                    elif sign==')' and p==1: break
-                    elif sign==')' and p>1: p -= 1
-                    buff = buff + sign
-                buff = self.expression(buff)   # evaluate in subroutine
-                expr = expr.lstrip()
-            elif expr and sign+expr[0]=='||':  # evaluate logical 'or' with priority
-                expr = expr[1:]                # skip the second pipe
-                if ands:                       # terminate openned 'and' clause
-                    ands.append(buff)
-                    buff = np.all([self._eval_comparison(a) for a in ands])
-                    ands = []
-                ors.append(buff)
-                buff = ''
-            elif expr and sign+expr[0]=='&&':  # evaluate logical 'and'
-                expr = expr[1:]                # skip the second ampersend
-                ands.append(buff)
-                buff = ''
-            elif sign in ['\n','\t']:          # remove special characters
-                continue
-            else:
-                buff = buff + sign             # add character to a buffer
-        if ands:                               # terminate last openned 'and' clause
-            ands.append(buff)
-            buff = np.all([self._eval_comparison(a) for a in ands])
-        ors.append(buff)                       # terminate 'or' clause
-        return np.any([self._eval_comparison(o) for o in ors])    
+        return DPML_Expression.compile(expr).evaluate(self)
         
     # Display final nodes
     def display(self):
@@ -332,43 +346,38 @@ class DPML:
             print()
 
     # Produce final data structure
-    def data(self):
+    # Nested data are cached until nodes change, and should not be modified
+    def data(self, nested=False):
+        if nested:
+            nodes, version = self.nodes, self.nodes.version
+            if self.nested is None or self.nested[0] is not nodes or self.nested[1]!=version:
+                self.nested = (nodes, version, nodes.nested())
+            return self.nested[2]
         data = {}
         for node in self.nodes:
             data[node.name] = node.value
         return data
 
+    # Read-only access to values of nodes and their subnodes
+    def __getitem__(self, key):
+        return DPML_View(self.nodes.tree)[key]
+
     # Use node values to parse a template
+    # Output can be a file name, or an open file object that the template is streamed to
     def template(self, template, output=None):
         if os.path.isfile(template): 
             with open(template,'r') as f:
-                tpl = f.read()
-        else:
-            tpl = template
-        out = ''
-        kwargs = {'line':0, 'source': 'template', 'keyword':'tpl'}
-        while len(tpl)>0:
-            sign, tpl = tpl[0], tpl[1:]
-            if sign=='{':
-                p = DPML_Parser(code=tpl, **kwargs)
-                p.get_import()
-                p.get_format()
-                if p.value and p.ccode[0]=='}':
-                    nodes = self.request(p.value, count=1)
-                    if p.formating:
-                        form = "{0"+p.formating+"}"
-                        out += form.format(nodes[0].value)
-                    else:
-                        out += str(nodes[0].value)
-                    tpl = p.ccode[1:]
-                else:
-                    out += sign
-            else:
-                out += sign
-        if output:
-            with open(template,'r+') as f:
+                template = f.read()
+        tpl = DPML_Template.compile(template)
+        if output is None:
+            return tpl.render(self)
+        elif isinstance(output, str):
+            out = tpl.render(self)
+            with open(output,'w') as f:
                 f.write(out)
-        return out
+            return out
+        else:
+            tpl.write(self, output)
             
                 
         
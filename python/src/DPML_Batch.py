@@ -0,0 +1,54 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from DPML_Cache import *
+from DPML_Settings import *
+import DPML
+
+# Set up the import cache of a worker process
+def _init_worker(compile):
+    DPML_Files.compile = compile
+
+# Parse a single file and measure its parsing time
+def _parse_file(filepath, compile=False):
+    start = time.perf_counter()
+    try:
+        with DPML.DPML() as p:
+            p.load(filepath, stream=True)
+            p.initialize(compiled=compile)
+            if compile:
+                p.compile()
+            data, error = p.data(), None
+    except Exception as e:
+        data, error = None, e
+    return {
+        'filepath': filepath,
+        'data':     data,
+        'error':    error,
+        'time':     time.perf_counter()-start,
+    }
+
+class DPML_Batch:
+
+    def __init__(self, workers=None, compile=False):
+        self.workers = workers or os.cpu_count()
+        # Compiled files of parsed documents and imports are shared by all workers
+        self.compile = compile
+
+    # Parse files in parallel, results are returned in the order of the files
+    def parse(self, filepaths):
+        filepaths = list(filepaths)
+        if self.workers==1 or len(filepaths)<2:
+            compile, DPML_Files.compile = DPML_Files.compile, self.compile
+            try:
+                return [_parse_file(filepath, self.compile) for filepath in filepaths]
+            finally:
+                DPML_Files.compile = compile
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, len(filepaths)),
+            initializer=_init_worker, initargs=(self.compile,)
+        ) as pool:
+            return list(pool.map(
+                _parse_file, filepaths, [self.compile]*len(filepaths)
+            ))
@@ -0,0 +1,120 @@
+import sys
+import json
+import argparse
+import numpy as np
+from contextlib import redirect_stdout
+
+from DPML import *
+
+# Convert node values that JSON does not support
+class DPML_Encoder(json.JSONEncoder):
+
+    def default(self, value):
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        if isinstance(value, np.generic):
+            return value.item()
+        return super().default(value)
+
+# Text of an error, DPML exceptions carry a message and its arguments
+def error_message(e):
+    if type(e) is Exception:
+        return " ".join(str(arg) for arg in e.args)
+    return str(e) or type(e).__name__
+
+def initialize(filepath, args):
+    p = DPML()
+    p.load(filepath)
+    p.initialize(profile=args.profile)
+    if args.profile:
+        # profile is printed to the error output, so that printed data stay valid
+        with redirect_stdout(sys.stderr):
+            print(f"Profile: {filepath}")
+            p.report.display(args.limit)
+    return p
+
+# Parse files in parallel and report their errors
+def cmd_parse(args):
+    if args.profile and (args.workers is not None or args.compile):
+        # profiles are collected serially in a single process without compiled files
+        raise Exception("Option --profile cannot be combined with --workers or --compile")
+    if args.profile:
+        results = []
+        for filepath in args.files:
+            try:
+                initialize(filepath, args)
+                results.append({'filepath': filepath, 'error': None})
+            except Exception as e:
+                results.append({'filepath': filepath, 'error': e})
+    else:
+        results = DPML_Batch(args.workers, args.compile).parse(args.files)
+    failed = 0
+    for result in results:
+        if result['error'] is None:
+            print(f"OK {result['filepath']}" + (f" ({result['time']*1e3:.1f} ms)" if 'time' in result else ''))
+        else:
+            print(f"ERROR {result['filepath']}: {error_message(result['error'])}", file=sys.stderr)
+            failed += 1
+    return 1 if failed else 0
+
+# Write node values as JSON or NPZ
+def cmd_dump(args):
+    p = initialize(args.file, args)
+    if args.format=='npz':
+        if not args.output:
+            raise Exception("NPZ format requires an output file")
+        np.savez(args.output, **p.data())
+        return 0
+    text = json.dumps(p.data(nested=args.nested), cls=DPML_Encoder, indent=args.indent)
+    if args.output:
+        with open(args.output,'w') as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+# Render a template with node values
+def cmd_template(args):
+    p = initialize(args.file, args)
+    if args.output:
+        p.template(args.template, args.output)
+    else:
+        sys.stdout.write(p.template(args.template))
+    return 0
+
+def parser():
+    parser = argparse.ArgumentParser(prog='dpml', description="Dimensional Parameter Markup Language")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--profile', action='store_true', help="print times of parsing phases, slowest nodes and imports")
+    common.add_argument('--limit', type=int, default=10, help="number of slowest nodes in the profile")
+    commands = parser.add_subparsers(dest='command', required=True)
+    cmd = commands.add_parser('parse', parents=[common], help="check that files can be parsed")
+    cmd.add_argument('files', nargs='+')
+    cmd.add_argument('--workers', type=int, default=None, help="number of parallel processes")
+    cmd.add_argument('--compile', action='store_true', help="save compiled files")
+    cmd.set_defaults(fn=cmd_parse)
+    cmd = commands.add_parser('dump', parents=[common], help="write node values")
+    cmd.add_argument('file')
+    cmd.add_argument('--format', choices=['json','npz'], default='json')
+    cmd.add_argument('--nested', action='store_true', help="nest JSON values following node names")
+    cmd.add_argument('--indent', type=int, default=2)
+    cmd.add_argument('--output', help="output file, JSON is printed if not given")
+    cmd.set_defaults(fn=cmd_dump)
+    cmd = commands.add_parser('template', parents=[common], help="render a template")
+    cmd.add_argument('file')
+    cmd.add_argument('template', help="template file or text")
+    cmd.add_argument('--output', help="output file, text is printed if not given")
+    cmd.set_defaults(fn=cmd_template)
+    return parser
+
+# Run a command, return exit status
+def main(argv=None):
+    args = parser().parse_args(argv)
+    try:
+        return args.fn(args)
+    except Exception as e:
+        print(f"ERROR: {error_message(e)}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
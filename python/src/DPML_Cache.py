@@ -0,0 +1,113 @@
+import os
+from time import perf_counter
+from contextlib import contextmanager
+
+from DPML_LRUCache import *
+from DPML_Profiler import *
+from DPML_Settings import *
+import DPML
+
+class DPML_FileCache:
+
+    def __init__(self, maxsize=FILE_CACHE_SIZE):
+        self.cache = DPML_LRUCache(maxsize)
+        self.loading = []        # dependency sets of files that are being parsed
+        self.parsing = []        # paths of files that are being parsed
+        self.compile = False     # use and save compiled files of parsed files
+
+    # File stamp used to detect modifications
+    def stamp(self, filepath):
+        stat = os.stat(filepath)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    # Check if none of the file dependencies changed
+    def _valid(self, entry):
+        for filepath, stamp in entry['depends'].items():
+            try:
+                if self.stamp(filepath)!=stamp:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    # Record dependencies of a file into all files that are currently parsed
+    def _depend(self, depends):
+        for loading in self.loading:
+            loading.update(depends)
+
+    # Record a file that is read by the files that are currently parsed
+    def depend(self, filepath):
+        if self.loading:
+            path = os.path.abspath(filepath)
+            self._depend({path: self.stamp(path)})
+
+    # Collect dependencies of files parsed within the context
+    @contextmanager
+    def track(self, depends):
+        self.loading.append(depends)
+        try:
+            yield depends
+        finally:
+            self.loading.pop()
+
+    # Mark files that are being parsed, importing any of them again would be circular
+    @contextmanager
+    def parsing_files(self, filepaths):
+        paths = [os.path.abspath(filepath) for filepath in filepaths]
+        for path in paths:
+            if path in self.parsing:
+                chain = self.parsing[self.parsing.index(path):] + [path]
+                raise Exception("Circular import:", " -> ".join(chain))
+        self.parsing.extend(paths)
+        try:
+            yield
+        finally:
+            del self.parsing[len(self.parsing)-len(paths):]
+
+    # Return cache entry of a file, parse the file only if it changed
+    def _entry(self, filepath):
+        path = os.path.abspath(filepath)
+        entry = self.cache.get(path, valid=self._valid)
+        if entry is None:
+            start = perf_counter()
+            with DPML.DPML() as p:
+                p.load(filepath, stream=True)
+                p.initialize(compiled=self.compile)
+                if self.compile:
+                    p.compile()
+            entry = {'document': p, 'depends': p.depends, 'queries': {}}
+            self.cache.set(path, entry)
+            if DPML_Profile.report is not None:
+                DPML_Profile.report.add_file(path, perf_counter()-start)
+        elif DPML_Profile.report is not None:
+            DPML_Profile.report.add_file(path, 0)
+        self._depend(entry['depends'])
+        return entry
+
+    # Return parsed document of a file
+    def request(self, filepath):
+        return self._entry(filepath)['document']
+
+    # Return nodes selected from a file
+    # Selection is done once for every query, imports get only renamed views of the selected nodes
+    def query(self, filepath, query):
+        entry = self._entry(filepath)
+        nodes = entry['queries'].get(query)
+        if nodes is None:
+            nodes = entry['queries'][query] = entry['document'].query(query)
+        return [node.view() for node in nodes]
+
+    # Remove a file and all files importing it, or clear the whole cache
+    def invalidate(self, filepath=None):
+        if filepath is None:
+            self.cache.clear()
+            return
+        path = os.path.abspath(filepath)
+        for key, entry in list(self.cache.items.items()):
+            if path in entry['depends']:
+                self.cache.pop(key)
+
+    def stats(self):
+        return self.cache.stats()
+
+DPML_Files = DPML_FileCache()
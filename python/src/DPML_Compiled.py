@@ -0,0 +1,93 @@
+import numpy as np
+import os
+import pickle
+import hashlib
+
+from DPML_Cache import *
+from DPML_Settings import *
+
+# Hash of a file content
+def file_hash(filepath):
+    digest = hashlib.sha256()
+    with open(filepath,'rb') as f:
+        for chunk in iter(lambda: f.read(1<<20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+# Reference to a memory mapped array that is mapped again after loading
+class DPML_MemmapRef:
+    __slots__ = ('filename', 'dtype', 'shape', 'offset', 'order')
+
+    def __init__(self, value):
+        self.filename = value.filename
+        self.dtype = value.dtype.str
+        self.shape = value.shape
+        self.offset = value.offset
+        self.order = 'F' if value.flags.f_contiguous and not value.flags.c_contiguous else 'C'
+
+    def memmap(self):
+        return np.memmap(
+            self.filename, dtype=self.dtype, mode='r',
+            offset=self.offset, shape=self.shape, order=self.order
+        )
+
+class DPML_Compiled:
+
+    def __init__(self, filepath):
+        self.source = os.path.abspath(filepath)
+        self.filepath = os.path.splitext(filepath)[0] + EXT_COMPILED
+
+    # Return nodes, units and dependencies, or None if any dependency changed
+    def load(self):
+        try:
+            with open(self.filepath,'rb') as f:
+                data = pickle.load(f)
+        except Exception:
+            # unreadable or outdated compiled files are parsed again
+            return None
+        if data.get('version')!=COMPILED_VERSION or data.get('source')!=self.source:
+            return None
+        depends = {}
+        for path, (stamp, digest) in data['depends'].items():
+            try:
+                depends[path] = DPML_Files.stamp(path)
+                # files with a different stamp can still have the same content
+                if depends[path]!=stamp and (digest is None or file_hash(path)!=digest):
+                    return None
+            except OSError:
+                return None
+        nodes = data['nodes']
+        for node in nodes:
+            if isinstance(node.value, DPML_MemmapRef):
+                node.value = node.value.memmap()
+        return nodes, data['units'], depends
+
+    # Save nodes, units and hashes of all dependencies
+    def save(self, nodes, units, depends):
+        hashes = {}
+        for path, stamp in depends.items():
+            if DPML_Files.stamp(path)!=stamp:
+                raise Exception("File changed after it was parsed:", path)
+            if os.path.splitext(path)[1] in [EXT_NUMPY]+EXT_RAW:
+                # large binary files are checked only by their stamps
+                hashes[path] = (stamp, None)
+            else:
+                hashes[path] = (stamp, file_hash(path))
+        packed = []
+        for node in nodes:
+            if isinstance(node.value, np.memmap):
+                # binary arrays are not stored in the compiled file
+                node = node.copy()
+                node.value = DPML_MemmapRef(node.value)
+            packed.append(node)
+        data = {
+            'version': COMPILED_VERSION,
+            'source':  self.source,
+            'depends': hashes,
+            'nodes':   packed,
+            'units':   list(units),
+        }
+        tmppath = f"{self.filepath}.{os.getpid()}.tmp"   # processes can compile the same file at once
+        with open(tmppath,'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmppath, self.filepath)
@@ -1,48 +1,118 @@
 import numpy as np
 import re
-from math import isclose
+from math import isclose, floor, log10
+from operator import add, sub
+from types import MappingProxyType
+from collections import ChainMap
 
 from DPML_Unit import *
+from DPML_LRUCache import *
 from DPML_UnitList import *
 from DPML_Settings import *
 
-class DPML_Converter:
+class DPML_UnitRegistry:
 
-    base: dict = {}
-    prefixes: dict = {}
-    derivates: dict = {}
-    arbitrary: dict = {}
-    custom: dict = {}
-    units: dict = {}
-    
-    def __init__(self, units=None):
+    def __init__(self):
         self.nbase = len(DPML_UnitList_Base)
-        self.npbase = self.nbase-1
         # Load unit lists into dictionaries
+        base, prefixes, derivates, arbitrary = {}, {}, {}, {}
         for unit in DPML_UnitList_Base:
-            self.base[unit[2]] = DPML_Unit(
+            base[unit[2]] = DPML_Unit(
                 unit[0], unit[1], symbol=unit[2], name=unit[3]
             )
         for unit in DPML_UnitList_Prefixes:
-            self.prefixes[unit[2]] = DPML_Unit(
+            prefixes[unit[2]] = DPML_Unit(
                 unit[0], unit[1], symbol=unit[2], dfn=unit[3], name=unit[4]
             )
         for unit in DPML_UnitList_Derivates:
-            self.derivates[unit[2]] = DPML_Unit(
+            derivates[unit[2]] = DPML_Unit(
                 unit[0], unit[1], symbol=unit[2], dfn=unit[3], name=unit[4]
             )
         for unit in DPML_UnitList_Arbitrary:
-            self.arbitrary[unit[1]] = DPML_Unit(
+            arbitrary[unit[1]] = DPML_Unit(
                 1.0, unit[0], symbol=unit[1], name=unit[2], arbitrary=True
             )
-        self.units = self.base | self.derivates | self.arbitrary
+        # Registry is shared by all converters and must not be modified
+        self.base = MappingProxyType(base)
+        self.prefixes = MappingProxyType(prefixes)
+        self.derivates = MappingProxyType(derivates)
+        self.arbitrary = MappingProxyType(arbitrary)
+        self.units = MappingProxyType(base | derivates | arbitrary)
+        self.suffixes = self.symbol_suffixes(self.units)
+
+    # All endings of unit symbols used to split prefixes from symbols
+    def symbol_suffixes(self, units):
+        return frozenset(
+            symbol[-n:] for symbol in units for n in range(1,len(symbol)+1)
+        )
+
+# Registry of predefined units is created only once
+DPML_Registry = DPML_UnitRegistry()
+
+class DPML_Conversion:
+    __slots__ = ('num', 'power', 'offset', 'divisor', 'scale', 'shift')
+
+    def __init__(self, num, power, offset=None, divisor=None):
+        self.num = num           # numerical factor
+        self.power = power       # power of ten factor
+        self.offset = offset     # offset of arbitrary units
+        self.divisor = divisor   # divisor applied after the offset
+        # Single affine transformation applied to arrays
+        if offset is None:
+            self.scale, self.shift = num*power, None
+        else:
+            self.scale, self.shift = num*power/divisor, offset/divisor
+
+    # Convert value using precomputed factors
+    def apply(self, value, inplace=False):
+        if isinstance(value, np.ndarray):
+            return self._apply_array(value, inplace)
+        value *= self.num
+        value *= self.power
+        if self.offset is not None:
+            value = (value + self.offset) / self.divisor
+        return value
+
+    # Convert whole array at once, reuse its buffer if allowed
+    def _apply_array(self, value, inplace):
+        if inplace and value.dtype.kind in 'fc' and value.flags.writeable:
+            out = value
+        else:
+            out = None
+        out = np.multiply(value, self.scale, out=out)
+        if self.shift is not None:
+            np.add(out, self.shift, out=out)
+        return out
+
+class DPML_Converter:
+
+    # Compiled expressions and conversions are shared by all converters
+    expressions = DPML_LRUCache(UNIT_CACHE_SIZE)
+    conversions = DPML_LRUCache(UNIT_CACHE_SIZE)
+
+    base: dict = DPML_Registry.base
+    prefixes: dict = DPML_Registry.prefixes
+    derivates: dict = DPML_Registry.derivates
+    arbitrary: dict = DPML_Registry.arbitrary
+    units: dict = DPML_Registry.units
+    
+    def __init__(self, units=None):
+        self.nbase = DPML_Registry.nbase
+        self.npbase = self.nbase-1
+        # Custom units are layered over the shared registry
+        self.custom = {}
+        self.suffixes = DPML_Registry.suffixes
+        self.signature = ()      # identifies custom units in cache keys
         if units:
             for unit in units:
-                print(unit.symbol)
-                if unit.symbol in self.units:
+                if unit.symbol in self.units or unit.symbol in self.custom:
                     raise Exception('Following unit already exits:', unit.symbol)
                 self.custom[unit.symbol] = unit
-            self.units = self.units | self.custom
+            self.units = ChainMap(self.custom, DPML_Registry.units)
+            self.suffixes = self.suffixes | DPML_Registry.symbol_suffixes(self.custom)
+            self.signature = tuple(
+                (unit.symbol, unit.num, unit.base) for unit in units
+            )
 
     def __enter__(self):
         return self
@@ -57,35 +127,31 @@ class DPML_Converter:
             return False
         return True
 
-    def _rebase(self, unit):
-        exp = int(np.floor(np.log10(unit.num)))
-        num = unit.num/10**exp
-        unit.num = num
-        unit.base[-1] += exp
-        return unit
+    # Normalize number to a mantissa and a power of ten exponent
+    def _rebase(self, num, base):
+        exp = int(floor(log10(num)))
+        return DPML_Unit(num/10**exp, base[:-1]+(base[-1]+exp,))
     
     def multiply(self, unit1, unit2):
         num = unit1.num*unit2.num
-        base = [unit1.base[i]+unit2.base[i] for i in range(self.nbase)]
-        return self._rebase(DPML_Unit(num, base))
+        base = tuple(map(add, unit1.base, unit2.base))
+        return self._rebase(num, base)
 
     def divide(self, unit1, unit2):
         num = unit1.num/unit2.num
-        base = [unit1.base[i]-unit2.base[i] for i in range(self.nbase)]
-        return self._rebase(DPML_Unit(num, base))
+        base = tuple(map(sub, unit1.base, unit2.base))
+        return self._rebase(num, base)
 
     def power(self, unit, power):
         num = unit.num**power
-        base = [unit.base[i]*power for i in range(self.nbase)]
-        return self._rebase(DPML_Unit(num, base))
+        base = tuple(b*power for b in unit.base)
+        return self._rebase(num, base)
 
     def unit(self, string=None):
         # parse number
         m = re.match('^([0-9.]+)(e([0-9+-]+)|)$', string)
         if m:
-            num = float(string)
-            base = [0]*self.nbase
-            return self._rebase(DPML_Unit(num, base))
+            return self._rebase(float(string), (0,)*self.nbase)
         # parse unit
         string_bak = string
         exp, base, prefix = '', '', ''
@@ -97,11 +163,8 @@ class DPML_Converter:
             exp = symbol+exp
             symbol, string = string[-1], string[:-1]
         # parse unit symbol
-        unitkeys = self.units.keys()
         while len(string):
-            nbase = len(base)+1
-            ukeys = [key[-nbase:] for key in unitkeys]
-            if symbol+base not in ukeys:
+            if symbol+base not in self.suffixes:
                 break
             base = symbol+base
             symbol, string = string[-1], string[:-1]
@@ -117,7 +180,7 @@ class DPML_Converter:
                 raise Exception(f"Unit prefix '{prefix}' is not available in: {string_bak}")
             unit = self.multiply(self.prefixes[prefix],self.units[base])
         else:
-            unit = self.units[base]
+            unit = self.units[base].copy()   # registry units are shared
         # apply exponent
         if exp:
             unit = self.power(unit,int(exp))
@@ -126,7 +189,17 @@ class DPML_Converter:
         #print("%-06s"%string_bak, "%-03s"%prefix, "%-03s"%base, "%03s"%exp, unit)
         return unit
 
-    def expression(self, right, expr_bak=None):
+    # Parse unit expression, or return a copy of its cached result
+    # Cached units are shared by all converters and must not be modified
+    def expression(self, expr):
+        key = (expr, self.signature)
+        unit = self.expressions.get(key)
+        if unit is None:
+            unit = self._expression(expr)
+            self.expressions.set(key, unit)
+        return unit.copy()
+
+    def _expression(self, right, expr_bak=None):
         if not expr_bak:
             expr_bak = right
         if right.count('(')!=right.count(')'):
@@ -137,8 +210,8 @@ class DPML_Converter:
         while right:
             if symbol=='*':
                 return self.multiply(
-                    self.expression(left, expr_bak),
-                    self.expression(right, expr_bak)
+                    self._expression(left, expr_bak),
+                    self._expression(right, expr_bak)
                 )
             elif symbol=='/':
                 if '/' in right:
@@ -149,8 +222,8 @@ class DPML_Converter:
                     parts.insert(0,left)
                     left = '/'.join(parts)
                 return self.divide(
-                    self.expression(left, expr_bak),
-                    self.expression(right, expr_bak)
+                    self._expression(left, expr_bak),
+                    self._expression(right, expr_bak)
                 )
             elif symbol=='(':
                 parentheses = 1
@@ -163,7 +236,7 @@ class DPML_Converter:
                     else:
                         left = left + symbol
                     if not right:
-                        return self.expression(left)
+                        return self._expression(left)
                     symbol, right = right[0], right[1:]
             else:
                 left = left + symbol
@@ -172,15 +245,39 @@ class DPML_Converter:
         unit.symbol = expr_bak
         return unit
         
-    def convert(self, value, exp1, exp2):
+    # Prepare factors converting values between two unit expressions
+    def conversion(self, exp1, exp2):
         unit1 = self.expression(exp1)
         unit2 = self.expression(exp2)
-        factor = self.divide(unit1,unit2)
-        if factor.base[:self.npbase]!=[0]*self.npbase:
+        if unit1.dimension!=unit2.dimension:
             raise Exception(f"Units '{exp1}' and '{exp2}' cannot be converted")
         if unit1.arbitrary or unit2.arbitrary:
-            return DPML_Convert_Arbitrary(value, unit1, unit2)
+            conv = "_".join([unit1.symbol_base, unit2.symbol_base])
+            if conv not in DPML_UnitList_Offsets:
+                raise Exception(f"No conversion of arbitrary unit '{unit1.symbol}' to '{unit2.symbol}' was found.")
+            return DPML_Conversion(
+                unit1.num*10**unit1.base[-1], 1,
+                DPML_UnitList_Offsets[conv],
+                unit2.num*10**unit2.base[-1],
+            )
         else:
-            value *= factor.num
-            value *= 10**factor.base[self.base['1e'].base.index(1)]
-            return value
+            factor = self.divide(unit1,unit2)
+            return DPML_Conversion(
+                factor.num,
+                10**factor.base[self.base['1e'].base.index(1)],
+            )
+
+    def convert(self, value, exp1, exp2, inplace=False):
+        key = (exp1, exp2, self.signature)
+        conv = self.conversions.get(key)
+        if conv is None:
+            conv = self.conversion(exp1, exp2)
+            self.conversions.set(key, conv)
+        return conv.apply(value, inplace)
+
+    # Statistics of the expression and conversion caches
+    def cache_stats(self):
+        return {
+            'expressions': self.expressions.stats(),
+            'conversions': self.conversions.stats(),
+        }
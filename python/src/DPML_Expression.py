@@ -0,0 +1,213 @@
+import numpy as np
+import re
+from math import isclose
+from collections import deque
+
+from DPML_Type import *
+from DPML_Parser import *
+from DPML_LRUCache import *
+from DPML_Settings import *
+
+# Logical operators, parentheses and the text of comparisons between them
+RE_TOKENS = re.compile(r'\|\||&&|\(|\)|(?:[^|&()]|\|(?!\|)|&(?!&))+')
+
+# Compare scalars, or arrays element-wise, with a relative tolerance
+def _isclose(a, b):
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return np.isclose(a, b, rtol=EQUAL_PRECISION, atol=0)
+    return isclose(a, b, rel_tol=EQUAL_PRECISION)
+
+# List of comparison operators in the order of their detection
+COMPARISONS = [
+    # neglect python rounding errors using 'isclose' function
+    ('==', lambda a,b: np.all(_isclose(a, b))),
+    ('!=', lambda a,b: np.any(a!=b)),
+    ('>=', lambda a,b: np.all((a>b)|_isclose(a, b))),
+    ('<=', lambda a,b: np.all((a<b)|_isclose(a, b))),
+    ('>',  lambda a,b: np.all(a>b) ),
+    ('<',  lambda a,b: np.all(a<b) ),
+]
+
+class DPML_Operand:
+    __slots__ = ('code', 'negate', 'defined', 'path', 'value', 'units')
+
+    def __init__(self, code):
+        self.negate = False
+        self.defined = False
+        if code[0]==SGN_NEGATE:
+            self.negate = True
+            code = code[1:]
+        if code[0]==SGN_DEFINED:
+            self.defined = True
+            code = code[1:]
+        self.code = code
+        # parse node from the code
+        p = DPML_Parser(code=code, line=0, source='expression', keyword='node')
+        p.get_value(equal_sign=False)
+        self.path = p.value if p.isimport else None
+        if not p.isimport and p.value not in [KWD_TRUE,KWD_FALSE]:
+            p.get_units()
+        self.value = p.value
+        self.units = p.units
+
+    def _boolean(self, value):
+        return DPML_Type_Boolean(
+            value_raw=KWD_TRUE if value else KWD_FALSE, value=value,
+            code=self.code, line=0, source='expression'
+        )
+
+    # Create a node from the operand using current nodes of a document
+    def node(self, doc):
+        if self.path is not None:   # import existing node
+            nodes = doc.request(self.path, count=[0,1])
+            if self.defined:
+                node = self._boolean(len(nodes)==1)
+            else:
+                node = nodes[0] if nodes else None
+        elif self.value==KWD_TRUE:
+            node = self._boolean(True)
+        elif self.value==KWD_FALSE:
+            node = self._boolean(False)
+        else:                       # create anonymous node
+            node = DPML_Type(
+                code=self.code, line=0, source='expression', keyword='node',
+                value_raw=self.value, units=self.units
+            )
+            node.set_value()
+        if self.negate:
+            if node.keyword=='bool':
+                node.value = not node.value
+                node.value_raw = KWD_TRUE if node.value else KWD_FALSE
+            else:
+                raise Exception(f"Negated node is not boolean but:", node.keyword)
+        return node
+
+class DPML_Comparison:
+    __slots__ = ('code', 'fn', 'left', 'right')
+
+    def __init__(self, code):
+        self.code = code
+        self.fn = None
+        for sign,fn in COMPARISONS:
+            if sign not in code:
+                continue
+            left,right = code.split(sign)
+            self.fn = fn
+            self.left = self._operand(left)
+            self.right = self._operand(right)
+            break
+        else:
+            self.left = self._operand(code)
+            self.right = None
+
+    def _operand(self, code):
+        code = code.strip()
+        return DPML_Operand(code) if code else None
+
+    def evaluate(self, doc):
+        # evaluate single comparisons
+        if self.fn is None:
+            if self.left is None:
+                raise Exception("Invalid expression:", self.code)
+            node = self.left.node(doc)
+            node.set_value()
+            if node.keyword=='bool':
+                return node.value
+            else:
+                raise Exception("Single node expression needs to be a boolean:", self.code)
+        # evaluate pair comparisons
+        left = self.left.node(doc) if self.left else None
+        right = self.right.node(doc) if self.right else None
+        if not left or not right:
+            raise Exception("Couldn't find all requested nodes:", self.code)
+        if left.keyword=='node':            # if left node datatype is unknown
+            left.set_value(left.cast_value(right))
+            left.convert_units(right, doc.units)
+            right.set_value()
+        elif right.keyword=='node':         # if right node datatype is unknown
+            left.set_value()
+            right.set_value(right.cast_value(left))
+            right.convert_units(left, doc.units)
+        elif left.keyword==right.keyword:   # if both datatypes are known
+            left.set_value()
+            right.set_value()
+            right.convert_units(left, doc.units)
+        else:                               # throw error if both datatypes are unknown
+            raise Exception("Invalid comparison:", self.code)
+        return self.fn(left.value, right.value)
+
+class DPML_Logical:
+    __slots__ = ('fn', 'terms')
+
+    def __init__(self, fn, terms):
+        self.fn = fn          # np.all for '&&', np.any for '||'
+        self.terms = terms
+
+    # All terms are evaluated, so that invalid conditions are always reported
+    def evaluate(self, doc):
+        return self.fn([term.evaluate(doc) for term in self.terms])
+
+class DPML_Expression:
+
+    # Compiled expressions are shared by all documents
+    compiled = DPML_LRUCache(EXPRESSION_CACHE_SIZE)
+
+    def __init__(self, code):
+        self.code = code
+        # check if parenthesis are properly terminated
+        if code.count('(')!=code.count(')'):
+            raise Exception('Unterminated parenthesis in expression:', code)
+        code = code.replace('\n','').replace('\t','')
+        self.tokens = deque(RE_TOKENS.findall(code))
+        self.tree = DPML_Logical(np.any, self._or())
+        if self.tokens:
+            raise Exception('Unterminated parenthesis in expression:', self.code)
+        del self.tokens
+
+    # Return compiled expression, or compile it if it was not used yet
+    @classmethod
+    def compile(cls, code):
+        code = code.strip()
+        expr = cls.compiled.get(code)
+        if expr is None:
+            expr = cls(code)
+            cls.compiled.set(code, expr)
+        return expr
+
+    def evaluate(self, doc):
+        return self.tree.evaluate(doc)
+
+    def _next(self, token):
+        if self.tokens and self.tokens[0]==token:
+            self.tokens.popleft()
+            return True
+        return False
+
+    # Terms separated by logical 'or'
+    def _or(self):
+        terms = [self._and()]
+        while self._next('||'):
+            terms.append(self._and())
+        return terms
+
+    # Terms separated by logical 'and' have a priority
+    def _and(self):
+        terms = [self._term()]
+        while self._next('&&'):
+            terms.append(self._term())
+        return terms[0] if len(terms)==1 else DPML_Logical(np.all, terms)
+
+    # Comparison, or a content of parenthesis
+    def _term(self):
+        text = self.tokens.popleft() if self.tokens and self.tokens[0] not in ['||','&&','(',')'] else ''
+        if not self._next('('):
+            return DPML_Comparison(text)
+        if text.strip():
+            raise Exception("Invalid expression:", self.code)
+        term = DPML_Logical(np.any, self._or())
+        if not self._next(')'):
+            raise Exception('Unterminated parenthesis in expression:', self.code)
+        if self.tokens and self.tokens[0] not in ['||','&&',')']:
+            if self.tokens.popleft().strip():
+                raise Exception("Invalid expression:", self.code)
+        return term
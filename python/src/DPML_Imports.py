@@ -0,0 +1,96 @@
+import os
+import re
+import time
+
+from DPML_Cache import *
+from DPML_Settings import *
+import DPML
+
+# External file paths in condition expressions
+RE_EXPRESSION_PATH = re.compile(r'\{([^}?]*)\?')
+
+# Absolute paths of DPML files imported by a node
+def imported_files(node):
+    if node.keyword=='condition':
+        paths = RE_EXPRESSION_PATH.findall(node.value_raw or '')
+    elif node.keyword=='import' or (node.isimport and SGN_QUERY in node.value_raw):
+        paths = [node.value_raw.split(SGN_QUERY)[0]]
+    else:
+        paths = []
+    return [os.path.abspath(path) for path in paths if path]
+
+class DPML_ImportGraph:
+
+    def __init__(self, filepath):
+        self.root = os.path.abspath(filepath)
+        self.imports = {}   # file -> files imported by the file
+        self.times = {}     # file -> time of file parsing
+        self._scan()
+
+    # Collect imports of the root file and all imported files
+    def _scan(self):
+        stack = [self.root]
+        while stack:
+            path = stack.pop()
+            if path in self.imports:
+                continue
+            imports = []
+            with DPML.DPML() as p:
+                p.load(path, stream=True)
+                for node in p._read_nodes(p.lines):
+                    for filepath in imported_files(node):
+                        if filepath not in imports:
+                            imports.append(filepath)
+            self.imports[path] = imports
+            stack.extend(reversed(imports))
+
+    # Files ordered so that every file follows all files it imports
+    def order(self):
+        order, done = [], set()
+        chain = [self.root]
+        stack = [iter(self.imports[self.root])]
+        while stack:
+            for path in stack[-1]:
+                if path in chain:
+                    chain = chain[chain.index(path):] + [path]
+                    raise Exception("Circular import:", " -> ".join(chain))
+                if path not in done:
+                    chain.append(path)
+                    stack.append(iter(self.imports[path]))
+                    break
+            else:
+                stack.pop()
+                path = chain.pop()
+                done.add(path)
+                order.append(path)
+        return order
+
+    # Parse all files in the order of their imports, every file only once
+    # Returned document holds views of the cached nodes, so the file cache cannot be modified
+    def parse(self):
+        for path in self.order():
+            start = time.perf_counter()
+            DPML_Files.request(path)
+            self.times[path] = time.perf_counter() - start
+        doc = DPML_Files.request(self.root)
+        p = DPML.DPML()
+        p.use([node.view() for node in doc.nodes], list(doc.units))
+        p.files, p.depends = [self.root], dict(doc.depends)
+        return p
+
+    # Text tree of imports with parsing times
+    def dump(self):
+        lines, shown = [], set()
+        stack = [(self.root, 0)]
+        while stack:
+            path, depth = stack.pop()
+            line = "  "*depth + path
+            if path in self.times:
+                line += " (%.3f ms)"%(self.times[path]*1e3)
+            if path in shown and self.imports[path]:
+                lines.append(line + " ...")
+                continue
+            shown.add(path)
+            lines.append(line)
+            stack.extend((imp, depth+1) for imp in reversed(self.imports[path]))
+        return "\n".join(lines)
@@ -0,0 +1,165 @@
+import numpy as np
+from difflib import SequenceMatcher
+
+from DPML_NodeStore import *
+from DPML_Lexer import *
+from DPML_Cache import *
+from DPML_Settings import *
+
+# Compare recorded node states, arrays are compared element-wise
+def same_state(a, b):
+    if isinstance(a, np.ndarray) or isinstance(b, np.ndarray):
+        return (
+            isinstance(a, np.ndarray) and isinstance(b, np.ndarray) and
+            a.shape==b.shape and a.dtype==b.dtype and bool(np.array_equal(a, b))
+        )
+    if isinstance(a, (tuple,list)) and isinstance(b, (tuple,list)):
+        return len(a)==len(b) and all(same_state(x, y) for x,y in zip(a, b))
+    return bool(a==b)
+
+class DPML_Context:
+
+    def __init__(self, overrides=None):
+        self.nodes = DPML_NodeStore()
+        self.units = []
+        self.cname, self.cnum = [''], [0]
+        self.indents, self.parents = [-1], []
+        self.overrides = overrides or {}   # node values set by the user
+
+    # State of hierarchical names, conditions and units
+    def state(self):
+        return (
+            tuple(self.cname), tuple(self.cnum),
+            tuple(self.indents), tuple(self.parents),
+            tuple((unit.symbol, unit) for unit in self.units),
+        )
+
+    def restore(self, state):
+        self.cname, self.cnum = list(state[0]), list(state[1])
+        self.indents, self.parents = list(state[2]), list(state[3])
+
+class DPML_Statement:
+    __slots__ = (
+        'code', 'line',
+        'before', 'after',  # context states before and after the statement
+        'reads',            # states of nodes read by the statement
+        'depends',          # stamps of files read by the statement
+        'effects',          # copies of modified and (new) added nodes
+        'removed',          # names of removed nodes
+        'units',            # units defined by the statement
+    )
+
+    def __init__(self, code, line):
+        self.code = code
+        self.line = line
+
+class DPML_Incremental:
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.statements = []
+        self.overrides = {}
+
+    # Set node values, return names of values that changed
+    def override(self, values):
+        changed = set()
+        for name, value in values.items():
+            if name not in self.overrides or not same_state(self.overrides[name], value):
+                changed.add(name)
+            self.overrides[name] = value
+        return changed
+
+    # Execute a statement and record its dependencies and effects
+    def _execute(self, code, line, context):
+        stmt = DPML_Statement(code, line)
+        stmt.before = context.state()
+        nunits = len(context.units)
+        stmt.depends = {}
+        context.nodes.record()
+        try:
+            with DPML_Files.track(stmt.depends):
+                self.doc._statement(self.node(code, line), context)
+        finally:
+            stmt.reads, added, stmt.removed = context.nodes.recorded()
+        index = context.nodes.index
+        stmt.effects = [(index[name].copy(), True) for name in added]
+        for name, state in stmt.reads.items():
+            if name==SGN_WILDCARD or name==LAST_NODE or name in added:
+                continue
+            if name in index and not same_state(state, node_state(index[name])):
+                stmt.effects.append((index[name].copy(), False))
+        stmt.units = context.units[nunits:]
+        stmt.after = context.state()
+        return stmt
+
+    # Check if the statement would have the same effect as before
+    def _reusable(self, stmt, context, changed, clean):
+        if not same_state(stmt.before, context.state()):
+            return False
+        for path, stamp in stmt.depends.items():
+            try:
+                if DPML_Files.stamp(path)!=stamp:
+                    return False
+            except OSError:
+                return False
+        index = context.nodes.index
+        for name, state in stmt.reads.items():
+            if name==SGN_WILDCARD:
+                # wildcard queries depend on all preceding nodes
+                if not clean:
+                    return False
+            elif name==LAST_NODE:
+                if not index or next(reversed(index))!=state:
+                    return False
+            elif not same_state(state, node_state(index.get(name))):
+                return False
+        for node, new in stmt.effects:
+            if node.name in changed:
+                return False
+        return True
+
+    # Repeat recorded effects of a statement
+    def _apply(self, stmt, context, line):
+        for name in stmt.removed:
+            context.nodes.remove(name)
+        for node, new in stmt.effects:
+            node = node.copy()
+            if new:
+                if node.line==stmt.line:
+                    node.line = line
+                context.nodes.append(node)
+            else:
+                context.nodes.set(node)
+        context.units.extend(stmt.units)
+        context.restore(stmt.after)
+        DPML_Files._depend(stmt.depends)
+        stmt.line = line
+
+    # Initialize statements, reuse effects of statements that were not affected by changes
+    def update(self, statements, changed=set()):
+        lexer = DPML_Lexer(self.doc.source)
+        report = DPML_Profile.report
+        self.node = lexer.node if report is None else report.wrap('lexing', lexer.node)
+        old = self.statements
+        matcher = SequenceMatcher(
+            None, [stmt.code for stmt in old], [code for code, line in statements], autojunk=False
+        )
+        matched = {}
+        for a, b, size in matcher.get_matching_blocks():
+            for k in range(size):
+                matched[b+k] = a+k
+        context = DPML_Context(self.overrides)
+        recorded, clean = [], True
+        self.executed = 0
+        for j, (code, line) in enumerate(statements):
+            stmt = old[matched[j]] if j in matched else None
+            if stmt is not None and self._reusable(stmt, context, changed, clean):
+                self._apply(stmt, context, line)
+                clean = clean and matched[j]==j
+            else:
+                stmt = self._execute(code, line, context)
+                self.executed += 1
+                clean = False
+            recorded.append(stmt)
+        self.statements = recorded
+        return context
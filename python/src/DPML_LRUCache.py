@@ -0,0 +1,51 @@
+from collections import OrderedDict
+
+class DPML_LRUCache:
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize   # maximum number of items, unbounded if None
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def __contains__(self, key):
+        return key in self.items
+
+    # Return a cached item and mark it as recently used, drop it if it is not valid anymore
+    def get(self, key, default=None, valid=None):
+        if key in self.items and valid and not valid(self.items[key]):
+            del self.items[key]
+        if key in self.items:
+            self.items.move_to_end(key)
+            self.hits += 1
+            return self.items[key]
+        self.misses += 1
+        return default
+
+    # Store an item and evict the least recently used ones
+    def set(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        if self.maxsize is not None:
+            while len(self.items)>self.maxsize:
+                self.items.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self.items.pop(key, default)
+
+    def clear(self):
+        self.items.clear()
+        self.hits = 0
+        self.misses = 0
+
+    # Cache statistics for monitoring
+    def stats(self):
+        return {
+            'hits':    self.hits,
+            'misses':  self.misses,
+            'size':    len(self.items),
+            'maxsize': self.maxsize,
+        }
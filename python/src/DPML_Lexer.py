@@ -0,0 +1,171 @@
+import re
+
+from DPML_Type import *
+from DPML_Node import *
+from DPML_Settings import *
+
+# Character set of node names
+NAME = r'[a-zA-Z0-9_.-]'
+
+# Node value with optional units
+# Lookaheads with backreferences make the value and the import path atomic,
+# so that the value is split exactly as the step parser in DPML_Parser would do it
+VALUE = (
+    r'\s*=\s*(?!\s)'
+    r'(?:\{(?P<import>[^}]+)\}'
+    r'|(?!\{[^}]*\})(?=(?P<value>"""(?P<block>.*)"""|"(?P<dquote>.*)"|\'(?P<squote>.*)\'|(?P<plain>[^# ]+)))(?P=value))'
+    r'(?:\s+(?P<units>[^\s#=]+))?'
+)
+
+# Master pattern classifying a single code line in one pass
+PATTERN = re.compile(
+    r'^(?P<indent>\s*)(?:'+
+    # import node: name {path}
+    r'(?P<nimport>(?:(?P<import_name>'+NAME+r'+) \s*)?\{(?P<import_path>[^}]*)\})'+
+    # unit definition: $unit name = value units
+    r'|(?P<nunit>(?P<unit_name>'+NAME+r'*'+re.escape(SGN_UNIT)+KWD_UNIT+r')\s+(?P<unit_value>[^#]*))'+
+    # comment node
+    r'|(?P<ncomment>)(?=#\s*\S)'+
+    # condition node: @case expression, @else, @end
+    r'|(?P<ncase>(?P<case_name>'+NAME+r'*'+SGN_CASE+KWD_CASE+r')\s+(?!\s)'+
+    r'(?=(?P<case_value>"""(?P<case_block>.*)"""|(?P<case_line>[^#]*)))(?P=case_value))'+
+    r'|(?P<nelse>'+NAME+r'*(?:'+SGN_CASE+KWD_ELSE+'|'+SGN_CASE+KWD_END+r'))(?=\s|$)'+
+    # nodes with values: option, modification and typed node
+    r'|(?:(?P<noption>(?==))|(?P<name>'+NAME+r'+)(?= )(?:'+
+    r'(?P<nmod> (?=\s*=))'+
+    r'|(?P<ntype> \s*(?P<keyword>bool|int|float|str|table)(?P<defined>'+re.escape(SGN_DEFINED)+r')?'+
+    r'(?P<dimension>(?:\[(?:[0-9]+|[0-9]*:[0-9]*)\])*))'+
+    r'))'+VALUE+
+    # group node
+    r'|(?P<group>'+NAME+r'+)(?= |$)'+
+    r')(?:\s*#\s*(?P<comment>.*)|\s*)$'
+)
+
+DIMENSION = re.compile(r'\[([0-9:]+)\]')
+
+TYPES = {
+    'bool':  DPML_Type_Boolean,
+    'int':   DPML_Type_Integer,
+    'float': DPML_Type_Float,
+    'str':   DPML_Type_String,
+    'table': DPML_Type_Table,
+}
+
+class DPML_Lexer:
+    source: str
+
+    def __init__(self, source):
+        self.source = source
+
+    # Convert symbols to original letters
+    def _decode(self, value):
+        if value is None or '$@' not in value:
+            return value
+        for i,symbol in enumerate(["\'", '\"', "\n"]):
+            value = value.replace(f"$@{i:02d}", symbol)
+        return value
+
+    # Split an import path into a file name and a query
+    def _import_source(self, path):
+        if SGN_QUERY in path:
+            filename, query = path.split(SGN_QUERY)
+            return filename
+        return path
+
+    # Parse a value, units and their import source
+    def _value(self, m, kwargs):
+        if m.group('import') is not None:
+            kwargs['value_raw'] = m.group('import')
+            kwargs['isimport'] = True
+            kwargs['source'] = self._import_source(m.group('import'))
+        else:
+            for group in ['block','dquote','squote','plain']:
+                if m.group(group) is not None:
+                    kwargs['value_raw'] = m.group(group)
+                    break
+        kwargs['units'] = m.group('units')
+
+    # Create node from a single line of code
+    def node(self, code, line):
+        ccode = code.replace("\n", "$@02") if "\n" in code else code
+        if ccode.strip()=='':
+            return DPML_Type_Empty(code=code, line=line, source=self.source)
+        m = PATTERN.match(ccode)
+        if m is None or not self._supported(m):
+            # Irregular lines are handled by the step parser that reports errors
+            node = DPML_Node(code=code, line=line, source=self.source)
+            return node.determine_type()
+        kwargs = {
+            'code':   self._decode(ccode),
+            'line':   line,
+            'source': self.source,
+            'indent': len(m.group('indent')),
+        }
+        if m.group('nimport') is not None:
+            path = m.group('import_path')
+            name = m.group('import_name')
+            kwargs['keyword'] = 'import'
+            kwargs['name'] = f"{name}.{{{path}}}" if name else f"{{{path}}}"
+            kwargs['value_raw'] = path
+            kwargs['isimport'] = True
+            kwargs['source'] = self._import_source(path)
+            cls = DPML_Type_Import
+        elif m.group('nunit') is not None:
+            kwargs['name'] = m.group('unit_name')
+            kwargs['value_raw'] = m.group('unit_value')
+            cls = DPML_Type_Unit
+        elif m.group('ncomment') is not None:
+            cls = DPML_Type_Empty
+        elif m.group('noption') is not None:
+            self._value(m, kwargs)
+            cls = DPML_Type_Option
+        elif m.group('ncase') is not None:
+            kwargs['name'] = m.group('case_name')
+            kwargs['value_raw'] = m.group('case_block') or m.group('case_line')
+            cls = DPML_Type_Condition
+        elif m.group('nelse') is not None:
+            kwargs['name'] = m.group('nelse')
+            cls = DPML_Type_Condition
+        elif m.group('nmod') is not None:
+            kwargs['name'] = m.group('name')
+            kwargs['keyword'] = 'mod'
+            self._value(m, kwargs)
+            cls = DPML_Type_Mod
+        elif m.group('ntype') is not None:
+            kwargs['name'] = m.group('name')
+            kwargs['keyword'] = m.group('keyword')
+            kwargs['defined'] = m.group('defined') is not None
+            if m.group('dimension'):
+                kwargs['dimension'] = self._dimension(m.group('dimension'))
+            self._value(m, kwargs)
+            cls = TYPES[m.group('keyword')]
+        else:
+            kwargs['name'] = m.group('group')
+            cls = DPML_Type_Group
+        kwargs['value_raw'] = self._decode(kwargs.get('value_raw'))
+        return cls(**kwargs)
+
+    # Check for valid lines that the fast path does not cover
+    def _supported(self, m):
+        if m.group('ncase') is not None:
+            # empty conditions are reported by the step parser
+            return bool(m.group('case_block') or m.group('case_line'))
+        for group in ['import_path','import']:
+            # multiple query signs are reported by the step parser
+            if m.group(group) and m.group(group).count(SGN_QUERY)>1:
+                return False
+        return True
+
+    # Parse dimension ranges
+    def _dimension(self, code):
+        dimension = []
+        for dim in DIMENSION.findall(code):
+            if ":" not in dim:
+                dimension.append((int(dim),int(dim)))
+            else:
+                dmin,dmax = dim.split(':')
+                dimension.append((
+                    int(dmin) if dmin else None,
+                    int(dmax) if dmax else None
+                ))
+        return dimension
@@ -1,5 +1,3 @@
-from typing import List,Tuple
-from pydantic import BaseModel
 import numpy as np
 import re
 
@@ -7,13 +5,25 @@ from DPML_Type import *
 from DPML_Parser import *
 from DPML_Settings import *
 
-class DPML_Node(BaseModel):
-    code: str               
-    line: int
-    source: str
-    
-    parser: DPML_Parser = None
-    node: DPML_Type = None
+# Precompiled patterns used to recognize node types
+RE_NODE_IMPORT    = re.compile(r'^([a-zA-Z0-9_.-]*\s*){(.*)}')
+RE_NODE_UNIT      = re.compile(r'^[a-zA-Z0-9_.-]*'+re.escape(SGN_UNIT)+KWD_UNIT)
+RE_NODE_OPTION    = re.compile(r'^=\s*')
+RE_NODE_CONDITION = re.compile(
+    r'^[a-zA-Z0-9_.-]*'+
+    SGN_CASE+'('+KWD_CASE+'|'+KWD_ELSE+'|'+KWD_END+')'
+)
+RE_NODE_MOD       = re.compile(r'^\s*=\s*')
+
+class DPML_Node:
+    __slots__ = ('code', 'line', 'source', 'parser', 'node')
+
+    def __init__(self, code, line, source):
+        self.code = code
+        self.line = line
+        self.source = source
+        self.parser = None
+        self.node = None
     
     def _node_type(self):
         self.parser.get_type()      # parse node type
@@ -42,7 +52,7 @@ class DPML_Node(BaseModel):
             self.node = DPML_Type_Empty(self.parser)
 
     def _node_import(self):
-        m=re.match(r'^([a-zA-Z0-9_.-]*\s*){(.*)}', self.parser.ccode)
+        m=RE_NODE_IMPORT.match(self.parser.ccode)
         if m:
             self.parser.keyword = 'import'
             if m.group(1):
@@ -53,18 +63,14 @@ class DPML_Node(BaseModel):
             self.node = DPML_Type_Import(self.parser)
 
     def _node_unit(self):
-        m=re.match(
-            r'^[a-zA-Z0-9_.-]*'+
-            re.escape(SGN_UNIT)+KWD_UNIT, 
-            self.parser.ccode
-        )
+        m=RE_NODE_UNIT.match(self.parser.ccode)
         if m:
             self.parser.get_unit()
             self.parser.get_comment()
             self.node = DPML_Type_Unit(self.parser)
 
     def _node_option(self):
-        m=re.match(r'^=\s*', self.parser.ccode)
+        m=RE_NODE_OPTION.match(self.parser.ccode)
         if m:           
             self.parser.get_value()
             self.parser.get_units()
@@ -72,11 +78,7 @@ class DPML_Node(BaseModel):
             self.node = DPML_Type_Option(self.parser)
 
     def _node_condition(self):
-        m=re.match(
-            r'^[a-zA-Z0-9_.-]*'+
-            SGN_CASE+'('+KWD_CASE+'|'+KWD_ELSE+'|'+KWD_END+')',
-            self.parser.ccode
-        )
+        m=RE_NODE_CONDITION.match(self.parser.ccode)
         if m:
             self.parser.get_condition()
             self.parser.get_comment()
@@ -88,7 +90,7 @@ class DPML_Node(BaseModel):
             self.node = DPML_Type_Group(self.parser)
 
     def _node_mod(self):       # Parse modification without type
-        m=re.match(r'^\s*=\s*', self.parser.ccode)
+        m=RE_NODE_MOD.match(self.parser.ccode)
         if m:
             self.parser.keyword = 'mod'
             self.parser.get_value()
@@ -0,0 +1,198 @@
+from collections.abc import Mapping
+
+from DPML_Settings import *
+
+# Key of the most recently declared node in recorded reads
+LAST_NODE = ('last',)
+
+# State of a node that other nodes can depend on
+def node_state(node):
+    if node is None:
+        return None
+    options = tuple(node.options) if node.options is not None else None
+    return (type(node), node.value, node.units, options, node.defined, node.dimension)
+
+class DPML_NodeStore:
+
+    def __init__(self, nodes=None):
+        self.index = {}       # node name -> node, kept in declaration order
+        self.position = {}    # node name -> declaration order
+        self.tree = {}        # name segment -> subtree, key None holds the node itself
+        self.version = 0      # incremented on every change of nodes
+        self.reads = None     # recorded states of read nodes
+        self.added = None     # recorded names of added nodes
+        self.removed = None   # recorded names of removed nodes
+        if nodes:
+            for node in nodes:
+                self.append(node)
+
+    # Start recording of node reads, additions and removals
+    def record(self):
+        self.reads, self.added, self.removed = {}, [], []
+
+    # Stop recording and return recorded reads, additions and removals
+    def recorded(self):
+        recorded = self.reads, self.added, self.removed
+        self.reads, self.added, self.removed = None, None, None
+        return recorded
+
+    def _read(self, name):
+        if name not in self.reads:
+            self.reads[name] = node_state(self.index.get(name))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        if self.reads is not None:
+            self.reads[SGN_WILDCARD] = True
+        return iter(self.index.values())
+
+    def __contains__(self, name):
+        if self.reads is not None:
+            self._read(name)
+        return name in self.index
+
+    def __getitem__(self, name):
+        if self.reads is not None:
+            self._read(name)
+        return self.index[name]
+
+    # Return node with a given name or a default value
+    def get(self, name, default=None):
+        if self.reads is not None:
+            self._read(name)
+        return self.index.get(name, default)
+
+    # Return the most recently declared node
+    def last(self):
+        if not self.index:
+            raise Exception("Node store is empty")
+        node = next(reversed(self.index.values()))
+        if self.reads is not None:
+            self.reads.setdefault(LAST_NODE, node.name)
+            self._read(node.name)
+        return node
+
+    # Add a new node at the end of the store
+    def append(self, node):
+        if node.name in self.index:
+            raise Exception(f"Node is already defined:", node.name)
+        self.index[node.name] = node
+        self.position[node.name] = len(self.position)
+        self._insert(node)
+        if self.added is not None:
+            self.added.append(node.name)
+
+    # Replace an existing node, or add a new one
+    def set(self, node):
+        if node.name not in self.position:
+            self.position[node.name] = len(self.position)
+        self.index[node.name] = node
+        self._insert(node)
+
+    # Remove a node with a given name
+    def remove(self, name):
+        del self.index[name]
+        del self.position[name]
+        self.version += 1
+        path, branch = [], self.tree
+        for part in name.split(SGN_SEPARATOR):
+            path.append((branch, part))
+            branch = branch[part]
+        del branch[None]
+        # remove branches without nodes
+        for parent, part in reversed(path):
+            if parent[part]:
+                break
+            del parent[part]
+        if self.removed is not None:
+            self.removed.append(name)
+
+    def _insert(self, node):
+        self.version += 1
+        branch = self.tree
+        for part in node.name.split(SGN_SEPARATOR):
+            branch = branch.setdefault(part, {})
+        branch[None] = node
+
+    # Nodes in all subtrees of a branch
+    def _subtree(self, branch):
+        nodes = []
+        stack = [child for key, child in branch.items() if key is not None]
+        while stack:
+            for key, child in stack.pop().items():
+                if key is None:
+                    nodes.append(child)
+                else:
+                    stack.append(child)
+        return nodes
+
+    # Select nodes matching a query in the order of their declaration
+    # Wildcard at the end of a query matches whole subtrees, otherwise a single name segment
+    def select(self, query):
+        parts = query.split(SGN_SEPARATOR)
+        if self.reads is not None:
+            if SGN_WILDCARD in parts:
+                self.reads[SGN_WILDCARD] = True
+            else:
+                self._read(query)
+        if query==SGN_WILDCARD:
+            return list(self.index.values())
+        branches = [self.tree]
+        for i, part in enumerate(parts):
+            if part!=SGN_WILDCARD:
+                branches = [branch[part] for branch in branches if part in branch]
+            elif i<len(parts)-1:
+                branches = [child for branch in branches for key, child in branch.items() if key is not None]
+            else:
+                nodes = [node for branch in branches for node in self._subtree(branch)]
+                break
+        else:
+            nodes = [branch[None] for branch in branches if None in branch]
+        if len(nodes)>1:
+            nodes.sort(key=lambda node: self.position[node.name])
+        return nodes
+
+    # Nested dictionaries of node values following the name hierarchy
+    def nested(self, branch=None):
+        data = {}
+        for key, child in (self.tree if branch is None else branch).items():
+            if key is None:
+                data[''] = child.value   # value of a node that has also subnodes
+            elif len(child)==1 and None in child:
+                data[key] = child[None].value
+            else:
+                data[key] = self.nested(child)
+        return data
+
+    # Ordered list of node names
+    def names(self):
+        if self.reads is not None:
+            self.reads[SGN_WILDCARD] = True
+        return list(self.index.keys())
+
+# Lazy read-only mapping of node values following the name hierarchy
+class DPML_View(Mapping):
+    __slots__ = ('branch',)
+
+    def __init__(self, branch):
+        self.branch = branch
+
+    def __getitem__(self, key):
+        if key=='' and None in self.branch:
+            return self.branch[None].value
+        child = self.branch[key]
+        if len(child)==1 and None in child:
+            return child[None].value
+        return DPML_View(child)
+
+    def __iter__(self):
+        for key in self.branch:
+            yield '' if key is None else key
+
+    def __len__(self):
+        return len(self.branch)
+
+    def __repr__(self):
+        return f"DPML_View({list(self)})"
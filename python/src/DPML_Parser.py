@@ -1,31 +1,63 @@
-from typing import List
-from pydantic import BaseModel
 import re
 
 from DPML_Settings import *
 
-class DPML_Parser(BaseModel):
-    code: str 
-    ccode: str
-    line: int = None
-    source: str = None
+# Precompiled patterns of the individual parsing steps
+RE_INDENT     = re.compile(r'^(\s*)')
+RE_CONDITION  = re.compile(
+    r'^(([a-zA-Z0-9_.-]*'+
+    SGN_CASE+KWD_CASE+
+    r')\s+("""(.*)"""|([^#]*)))'
+)
+RE_ELSE       = re.compile(
+    r'^([a-zA-Z0-9_.-]*('+
+    SGN_CASE+KWD_ELSE+'|'+
+    SGN_CASE+KWD_END+'))'
+)
+RE_UNIT       = re.compile(
+    r'^(([a-zA-Z0-9_.-]*'+
+    re.escape(SGN_UNIT)+KWD_UNIT+
+    r')\s+([^#]*))'
+)
+RE_NAME_PATH  = re.compile(r'^([a-zA-Z0-9_.-]+)')  # format of node names
+RE_NAME_UNIT  = re.compile(r'^([a-zA-Z0-9_]+)')    # format of unit names
+RE_TYPES      = [
+    (keyword, re.compile(r'^(\s+'+keyword+')'))
+    for keyword in ['bool','int','float','str','table']
+]
+RE_DIMENSION  = re.compile(r'^(\[([0-9:]+)\])')
+RE_IMPORT     = re.compile(r'^({([^}]*)})')
+RE_FORMAT     = re.compile(r'^(:[0-9.]*[sdfeb]+)')
+RE_EQUAL      = re.compile(r'^(\s*=\s*)')
+RE_VALUE      = re.compile(r'^(("""(.*)"""|"(.*)"|\'(.*)\'|([^# ]+)))')
+RE_UNITS      = re.compile(r'^(\s+([^\s#=]+))')
+RE_COMMENT    = re.compile(r'^(\s*#\s*(.*))$')
 
-    keyword: str = None
+class DPML_Parser:
+    __slots__ = (
+        'code', 'ccode', 'line', 'source',
+        'keyword', 'indent', 'name', 'value',
+        'isimport',                  # is value an import path?
+        'defined', 'units', 'comment', 'dimension', 'options', 'formating',
+    )
     dtype = str
-    indent: int = 0
-    name: str = None
-    value: str = None
-    isimport: bool = False           # is value an import path?
-    defined: bool = False
-    units: str = None
-    comment: str = None
-    dimension: List[tuple] = None
-    options: List[BaseModel] = None
-    formating: str = None
 
-    def __init__(self, **kwargs):
-        kwargs['ccode'] = kwargs['code']
-        super().__init__(**kwargs)
+    def __init__(self, code, line=None, source=None, keyword=None):
+        self.code = code
+        self.ccode = code
+        self.line = line
+        self.source = source
+        self.keyword = keyword
+        self.indent = 0
+        self.name = None
+        self.value = None
+        self.isimport = False
+        self.defined = False
+        self.units = None
+        self.comment = None
+        self.dimension = None
+        self.options = None
+        self.formating = None
     
     def _strip(self, text):
         self.ccode = self.ccode[len(text):]
@@ -34,18 +66,13 @@ class DPML_Parser(BaseModel):
         return self.ccode.strip()==''
 
     def get_indent(self):
-        m=re.match(r'^(\s*)',self.ccode)
+        m=RE_INDENT.match(self.ccode)
         if m:
             self.indent = len(m.group(1))
             self._strip(m.group(1))
 
     def get_condition(self):
-        m=re.match(
-            r'^(([a-zA-Z0-9_.-]*'+
-            SGN_CASE+KWD_CASE+
-            r')\s+("""(.*)"""|([^#]*)))',
-            self.ccode
-        )
+        m=RE_CONDITION.match(self.ccode)
         if m:
             self.name = m.group(2)
             if m.group(4):
@@ -56,23 +83,13 @@ class DPML_Parser(BaseModel):
                 raise Exception("Invalid condition format on line: ", self.code)
             self._strip(m.group(1))
         else:
-            m=re.match(
-                r'^([a-zA-Z0-9_.-]*('+
-                SGN_CASE+KWD_ELSE+'|'+
-                SGN_CASE+KWD_END+'))',
-                self.ccode
-            )
+            m=RE_ELSE.match(self.ccode)
             if m:
                 self.name = m.group(1)
                 self._strip(m.group(1))
 
     def get_unit(self):
-        m=re.match(
-            r'^(([a-zA-Z0-9_.-]*'+
-            re.escape(SGN_UNIT)+KWD_UNIT+
-            r')\s+([^#]*))',
-            self.ccode
-        )
+        m=RE_UNIT.match(self.ccode)
         if m:
             self.name = m.group(2)
             self.value = m.group(3)
@@ -80,9 +97,9 @@ class DPML_Parser(BaseModel):
                 
     def get_name(self, path=True):
         if path is True:
-            m=re.match(r'^([a-zA-Z0-9_.-]+)', self.ccode)  # format of node names
+            m=RE_NAME_PATH.match(self.ccode)
         else:
-            m=re.match(r'^([a-zA-Z0-9_]+)', self.ccode)    # format of unit names
+            m=RE_NAME_UNIT.match(self.ccode)
         if m:
             self.name = m.group(1)
             self._strip(m.group(1))
@@ -92,9 +109,8 @@ class DPML_Parser(BaseModel):
             raise Exception("Name has an invalid format: "+self.ccode)
         
     def get_type(self):
-        types = ['bool','int','float','str','table']
-        for keyword in types:
-            m=re.match(r'^(\s+'+keyword+')', self.ccode)
+        for keyword, pattern in RE_TYPES:
+            m=pattern.match(self.ccode)
             if m:
                 self.keyword = keyword
                 self._strip(m.group(1))
@@ -108,8 +124,7 @@ class DPML_Parser(BaseModel):
             self._strip(SGN_DEFINED)
         
     def get_dimension(self):
-        pattern = r'^(\[([0-9:]+)\])'
-        m=re.match(pattern, self.ccode)
+        m=RE_DIMENSION.match(self.ccode)
         if m: self.dimension = []
         while m:
             if ":" not in m.group(2):
@@ -121,10 +136,10 @@ class DPML_Parser(BaseModel):
                     int(dmax) if dmax else None
                 ))
             self._strip(m.group(1))
-            m=re.match(pattern, self.ccode)
+            m=RE_DIMENSION.match(self.ccode)
 
     def get_import(self):
-        m=re.match(r'^({([^}]*)})', self.ccode)
+        m=RE_IMPORT.match(self.ccode)
         if m:
             self.isimport = True 
             self.value = m.group(2)
@@ -141,7 +156,7 @@ class DPML_Parser(BaseModel):
             self._strip(m.group(1))
 
     def get_format(self):
-        m=re.match(r'^(:[0-9.]*[sdfeb]+)', self.ccode)
+        m=RE_FORMAT.match(self.ccode)
         if m:
             self.formating = m.group(1)
             self._strip(m.group(1))
@@ -149,7 +164,7 @@ class DPML_Parser(BaseModel):
     def get_value(self, equal_sign=True):
         # Remove equal sign
         if equal_sign:
-            m=re.match(r'^(\s*=\s*)', self.ccode)
+            m=RE_EQUAL.match(self.ccode)
             if m:
                 self._strip(m.group(1))
             else:
@@ -159,7 +174,7 @@ class DPML_Parser(BaseModel):
         if self.value:
             return
         # If not block value, parse standard text value
-        m=re.match(r'^(("""(.*)"""|"(.*)"|\'(.*)\'|([^# ]+)))', self.ccode)
+        m=RE_VALUE.match(self.ccode)
         if m:
             # Reduce matches
             results = [x for x in m.groups()[1:] if x is not None]
@@ -170,13 +185,13 @@ class DPML_Parser(BaseModel):
             raise Exception("Value cannot start with an empty string:", self.code)
         
     def get_units(self):
-        m=re.match(r'^(\s+([^\s#=]+))', self.ccode)
+        m=RE_UNITS.match(self.ccode)
         if m:
             self.units = m.group(2)
             self._strip(m.group(1))
         
     def get_comment(self):
-        m=re.match(r'^(\s*#\s*(.*))$', self.ccode)
+        m=RE_COMMENT.match(self.ccode)
         if m:
             self.comment = m.group(2)
             self._strip(m.group(1))
@@ -0,0 +1,98 @@
+from time import perf_counter
+from contextlib import contextmanager
+
+# Phases of node parsing that depend on the node keyword
+PARSE_PHASES = {
+    'import':    'imports',
+    'condition': 'conditions',
+    'table':     'tables',
+}
+
+# Phases called once for every node
+NODE_PHASES = {'parse', *PARSE_PHASES.values()}
+
+class DPML_Report:
+
+    def __init__(self):
+        self.total = 0
+        self.phases = {}     # phase -> [time, count]
+        self.keywords = {}   # node keyword -> [time, count]
+        self.files = {}      # imported file -> [parsing time, number of requests]
+        self.nodes = {}      # source:line of a node -> [time, count]
+
+    def _add(self, table, key, time, count=1):
+        entry = table.get(key)
+        if entry is None:
+            table[key] = [time, count]
+        else:
+            entry[0] += time
+            entry[1] += count
+
+    # Record time of a phase, of the node keyword and of the node code line
+    def add(self, phase, time, node=None):
+        self._add(self.phases, phase, time)
+        if node is not None:
+            # nodes are counted only once, other phases add only their time
+            count = int(phase in NODE_PHASES)
+            self._add(self.keywords, node.keyword, time, count)
+            self._add(self.nodes, f"{node.source}:{node.line}", time, count)
+
+    # Record a request of a file and its parsing time
+    def add_file(self, filepath, time):
+        self._add(self.files, filepath, time)
+
+    # Return function that records time of every call
+    def wrap(self, phase, fn, node=None):
+        def timed(*args):
+            start = perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self.add(phase, perf_counter()-start, node)
+        return timed
+
+    # Structured report, times are inclusive, e.g. imports include parsing of imported files
+    def data(self):
+        table = lambda entries: {
+            key: {'time': time, 'count': count} for key, (time, count) in entries.items()
+        }
+        return {
+            'total':    self.total,
+            'phases':   table(self.phases),
+            'keywords': table(self.keywords),
+            'files':    table(self.files),
+            'nodes':    table(self.nodes),
+        }
+
+    # Entries ordered from the slowest one
+    def slowest(self, entries, limit=None):
+        return sorted(entries.items(), key=lambda item: -item[1][0])[:limit]
+
+    # Print all phases, keywords and files, but only the slowest nodes
+    def display(self, limit=10):
+        print(f"total | {self.total*1e3:.3f} ms")
+        tables = [
+            ('phase',self.phases,None), ('keyword',self.keywords,None),
+            ('file',self.files,None), ('node',self.nodes,limit),
+        ]
+        for title, entries, size in tables:
+            for key, (time, count) in self.slowest(entries, size):
+                print(title,'|',key,'|',f"{time*1e3:.3f} ms",'|',count)
+
+class DPML_Profiler:
+
+    def __init__(self):
+        self.report = None   # report that is being recorded, None if profiling is disabled
+
+    # Record all parsing within the context into a report
+    @contextmanager
+    def record(self, report):
+        previous, self.report = self.report, report
+        start = perf_counter()
+        try:
+            yield report
+        finally:
+            report.total += perf_counter()-start
+            self.report = previous
+
+DPML_Profile = DPML_Profiler()
@@ -1,4 +1,12 @@
 EQUAL_PRECISION = 1e-6
+FILE_CACHE_SIZE = 64
+UNIT_CACHE_SIZE = 1024
+EXPRESSION_CACHE_SIZE = 1024
+TEMPLATE_CACHE_SIZE = 64
+COMPILED_VERSION = 1
+EXT_COMPILED    = '.dpmlc'
+EXT_NUMPY       = '.npy'
+EXT_RAW         = ['.bin','.raw']
 KWD_TRUE        = 'true'
 KWD_FALSE       = 'false'
 KWD_CASE        = 'case'
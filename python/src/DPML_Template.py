@@ -0,0 +1,54 @@
+import re
+
+from DPML_LRUCache import *
+from DPML_Settings import *
+
+# Placeholder of a node value with an optional format: {{path}:format}
+RE_PLACEHOLDER = re.compile(r'\{\{([^}]+)\}(:[0-9.]*[sdfeb]+)?\}')
+
+class DPML_Template:
+
+    # Compiled templates are shared by all documents
+    compiled = DPML_LRUCache(TEMPLATE_CACHE_SIZE)
+
+    def __init__(self, code):
+        self.code = code
+        self.segments = []   # literal strings and (path, formatter) placeholders
+        start = 0
+        for m in RE_PLACEHOLDER.finditer(code):
+            if m.start()>start:
+                self.segments.append(code[start:m.start()])
+            if m.group(2):
+                formatter = ("{0"+m.group(2)+"}").format
+            else:
+                formatter = str
+            self.segments.append((m.group(1), formatter))
+            start = m.end()
+        if start<len(code):
+            self.segments.append(code[start:])
+
+    # Return compiled template, or compile it if it was not used yet
+    @classmethod
+    def compile(cls, code):
+        tpl = cls.compiled.get(code)
+        if tpl is None:
+            tpl = cls(code)
+            cls.compiled.set(code, tpl)
+        return tpl
+
+    # Text segments with values of nodes from a document
+    def _pieces(self, doc):
+        for segment in self.segments:
+            if isinstance(segment, str):
+                yield segment
+            else:
+                path, formatter = segment
+                nodes = doc.request(path, count=1)
+                yield formatter(nodes[0].value)
+
+    def render(self, doc):
+        return ''.join(self._pieces(doc))
+
+    # Stream rendered template into a file object
+    def write(self, doc, f):
+        f.writelines(self._pieces(doc))
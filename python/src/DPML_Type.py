@@ -1,46 +1,90 @@
-from typing import List
-from pydantic import BaseModel
 import numpy as np
 import json
 import csv
+import io
+import re
+from time import perf_counter
 
 from DPML_Parser import *
 from DPML_Settings import *
 from DPML_Converter import *
+from DPML_Profiler import *
 import DPML
 
-class DPML_Type(BaseModel):
-    code: str 
-    line: int
-    source: str
-    keyword: str
-    
+# Leading and trailing whitespaces, and empty lines of a table body
+RE_TABLE_SPACE = re.compile(r'^[^\S\n]+|[^\S\n]+$', re.M)
+RE_TABLE_LINES = re.compile(r'\n{2,}')
+
+class DPML_Type:
+    __slots__ = (
+        'code', 'line', 'source', 'keyword',
+        'indent', 'name', 'value', 'value_raw',
+        'isimport', 'defined', 'units', 'dimension', 'options',
+    )
     dtype = str
-    indent: int = 0
-    name: str = None
-    value: str = None
-    value_raw: str = None
-    isimport: bool = False
-    defined: bool = False
-    units: str = None
-    dimension: List[tuple] = None
-    options: List[BaseModel] = None
+    default_keyword = None   # keyword of the node type
+    has_options = False      # node type accepts options
     
-    def __init__(self, parser=None, **kwargs):
+    def __init__(self, parser=None, code=None, line=None, source=None, keyword=None,
+                 indent=0, name=None, value=None, value_raw=None, isimport=False,
+                 defined=False, units=None, dimension=None, options=None):
         if parser:
-            kwargs['line'] = parser.line
-            kwargs['source'] = parser.source
-            kwargs['indent'] = parser.indent
-            kwargs['code'] = parser.code
-            kwargs['name'] = parser.name
-            kwargs['isimport'] = parser.isimport
-            kwargs['value_raw'] = parser.value
-            kwargs['units'] = parser.units
-            kwargs['dimension'] = parser.dimension
-            kwargs['defined'] = parser.defined
+            line = parser.line
+            source = parser.source
+            indent = parser.indent
+            code = parser.code
+            name = parser.name
+            isimport = parser.isimport
+            value_raw = parser.value
+            units = parser.units
+            dimension = parser.dimension
+            defined = parser.defined
             if parser.keyword:
-                kwargs['keyword'] = parser.keyword
-        super().__init__(**kwargs)
+                keyword = parser.keyword
+        self.code = code
+        self.line = line
+        self.source = source
+        self.keyword = keyword or self.default_keyword
+        self.indent = indent
+        self.name = name
+        self.value = value
+        self.value_raw = value_raw
+        self.isimport = isimport
+        self.defined = defined
+        self.units = units
+        self.dimension = dimension
+        if options is None and self.has_options:
+            options = []
+        self.options = options
+
+    def __repr__(self):
+        return f"{type(self).__name__}(name={self.name!r}, keyword={self.keyword!r}, value={self.value!r}, units={self.units!r})"
+
+    # Shallow copy of the node, options are not shared with the original
+    def copy(self):
+        node = object.__new__(type(self))
+        for attr in DPML_Type.__slots__:
+            setattr(node, attr, getattr(self, attr))
+        if self.options is not None:
+            node.options = list(self.options)
+        return node
+
+    # Copy of the node that shares its value
+    # Arrays are shared as read-only views, so they are copied only when modified
+    def view(self):
+        node = self.copy()
+        if isinstance(self.value, np.ndarray) and self.value.flags.writeable:
+            node.value = self.value.view()
+            node.value.flags.writeable = False
+        return node
+
+    # Compact state of the node used by pickle
+    def __getstate__(self):
+        return tuple(getattr(self, attr) for attr in DPML_Type.__slots__)
+
+    def __setstate__(self, state):
+        for attr, value in zip(DPML_Type.__slots__, state):
+            setattr(self, attr, value)
 
     def parse(self, nodes, units):
         return False
@@ -56,14 +100,18 @@ class DPML_Type(BaseModel):
                 raise Exception(f"Value of node '{node.name}' must be defined")
             else:
                 value = None
-        elif node.dimension:
+        elif node.dimension or isinstance(value, np.memmap):
             # cast multidimensional values
-            if isinstance(value, str):
+            if isinstance(value, np.memmap):
+                # memory mapped binary arrays are used without copying
+                self._check_binary(value, node)
+            elif isinstance(value, str):
                 value = np.array(json.loads(value), dtype=node.dtype)
             else:
-                value = np.array(value, dtype=node.dtype)
+                # arrays, e.g. table columns or shared read-only views, are copied only if the datatype changes
+                value = np.asarray(value, dtype=node.dtype)
             # check if dimensions are correct
-            for d,dim in enumerate(node.dimension):
+            for d,dim in enumerate(node.dimension or []):
                 shape = value.shape[d]
                 if dim[0] is not None and shape < dim[0]:
                     raise Exception(f"Node '{node.name}' has invalid dimension: dim({d})={shape} < {dim[0]}")
@@ -85,6 +133,17 @@ class DPML_Type(BaseModel):
                     value = node.dtype(value)
         return value
 
+    # Binary array has to match node datatype and number of dimensions
+    def _check_binary(self, value, node):
+        if node.keyword=='mod':
+            return
+        if not node.dimension:
+            raise Exception(f"Binary array cannot be assigned to a scalar node '{node.name}'")
+        if value.dtype.kind!=np.dtype(node.dtype).kind:
+            raise Exception(f"Binary array of node '{node.name}' has invalid datatype:", value.dtype)
+        if value.ndim!=len(node.dimension):
+            raise Exception(f"Binary array of node '{node.name}' has invalid number of dimensions:", value.ndim)
+
     # Set value using value_raw or arbitrary value
     def set_value(self, value=None):
         if value is None:
@@ -101,9 +160,14 @@ class DPML_Type(BaseModel):
     # Convert unit to units of another node
     def convert_units(self, node, units):
         if self.units and node.units and self.units!=node.units:
+            report = DPML_Profile.report
+            start = perf_counter() if report is not None else None
             with DPML_Converter(units) as p:
-                self.value = p.convert(self.value, self.units, node.units)
-                self.units = node.units        
+                # writeable arrays are private after casting, shared read-only arrays are copied by the converter
+                self.value = p.convert(self.value, self.units, node.units, inplace=True)
+                self.units = node.units
+            if report is not None:
+                report.add('units', perf_counter()-start)
 
     # Modify value taking value of a different node
     def modify_value(self, node, units):
@@ -125,16 +189,20 @@ class DPML_Type(BaseModel):
             raise Exception(f"Node '{self.keyword}' does not support options")
 
 class DPML_Type_Empty(DPML_Type):
-    keyword: str = 'empty'
+    __slots__ = ()
+    default_keyword = 'empty'
 
 class DPML_Type_Group(DPML_Type):
-    keyword: str = 'group'
+    __slots__ = ()
+    default_keyword = 'group'
 
 class DPML_Type_Option(DPML_Type):
-    keyword: str = 'option'
+    __slots__ = ()
+    default_keyword = 'option'
     
 class DPML_Type_Mod(DPML_Type):
-    keyword: str = 'mod'
+    __slots__ = ()
+    default_keyword = 'mod'
 
     def parse(self, nodes, units):
         if self.isimport:
@@ -144,8 +212,8 @@ class DPML_Type_Mod(DPML_Type):
         return None    
 
 class DPML_Type_Boolean(DPML_Type):
-    keyword: str = 'bool'
-    value: bool = None
+    __slots__ = ()
+    default_keyword = 'bool'
     dtype = bool
 
     def parse(self, nodes, units):
@@ -156,9 +224,9 @@ class DPML_Type_Boolean(DPML_Type):
         return None    
     
 class DPML_Type_Integer(DPML_Type):
-    keyword: str = 'int'
-    value: int = None
-    options: List[BaseModel] = []
+    __slots__ = ()
+    default_keyword = 'int'
+    has_options = True
     dtype = int
 
     def parse(self, nodes, units):
@@ -169,9 +237,9 @@ class DPML_Type_Integer(DPML_Type):
         return None    
     
 class DPML_Type_Float(DPML_Type):
-    keyword: str = 'float'
-    value: float = None
-    options: List[BaseModel] = []
+    __slots__ = ()
+    default_keyword = 'float'
+    has_options = True
     dtype = float
 
     def parse(self, nodes, units):
@@ -182,8 +250,9 @@ class DPML_Type_Float(DPML_Type):
         return None    
     
 class DPML_Type_String(DPML_Type):
-    keyword: str = 'str'
-    options: List[BaseModel] = []
+    __slots__ = ()
+    default_keyword = 'str'
+    has_options = True
 
     def parse(self, nodes, units):
         if self.isimport:
@@ -193,7 +262,8 @@ class DPML_Type_String(DPML_Type):
         return None    
 
 class DPML_Type_Condition(DPML_Type):
-    keyword: str = 'condition'
+    __slots__ = ()
+    default_keyword = 'condition'
 
     def parse(self, nodes, units):
         # Solve condition
@@ -204,7 +274,8 @@ class DPML_Type_Condition(DPML_Type):
         return None
 
 class DPML_Type_Unit(DPML_Type):
-    keyword: str = 'unit'
+    __slots__ = ()
+    default_keyword = 'unit'
 
     def parse(self, nodes, units):
         parser = DPML_Parser(
@@ -221,18 +292,26 @@ class DPML_Type_Unit(DPML_Type):
                 conv.unit(parser.value)
             )
             unit.symbol = '['+parser.name+']'
+            if unit.symbol in conv.units:
+                raise Exception('Following unit already exits:', unit.symbol)
             units.append(unit)
         return None
     
 class DPML_Type_Import(DPML_Type):
-    keyword: str = 'import'
+    __slots__ = ()
+    default_keyword = 'import'
 
     def parse(self, nodes, units):
         # Parse import code
         nodes_new = []
         with DPML.DPML() as p:
             p.use(nodes, units)
-            for node in p.request(self.value_raw):
+            imported = p.request(self.value_raw)
+            if self.value_raw==SGN_QUERY + SGN_WILDCARD:
+                # all local nodes are moved under the import name
+                for node in imported:
+                    nodes.remove(node.name)
+            for node in imported:
                 path = self.name.split(SGN_SEPARATOR + '{')
                 path.pop()
                 path.append(node.name)                
@@ -240,24 +319,23 @@ class DPML_Type_Import(DPML_Type):
                 node.line = self.line
                 node.name = SGN_SEPARATOR.join(path)
                 node.indent = self.indent
+                node.isimport = False   # values of imported nodes are already resolved
                 nodes_new.append(node)
         return nodes_new
 
 class DPML_Type_Table(DPML_Type):
-    keyword: str = 'table'
+    __slots__ = ()
+    default_keyword = 'table'
     
     def parse(self, nodes, units):
         if self.isimport:
             with DPML.DPML() as p:
                 p.use(nodes, units)
                 p.fill(self,self.value_raw)
-        lines = self.value_raw.split("\n")
+        header, body = self._split(self.value_raw)
         # Parse nodes from table header
         table = []
-        while len(lines)>0:
-            line = lines.pop(0)
-            if line.strip()=='':
-                break
+        for line in header:
             # Parse node parameters
             parser = DPML_Parser(
                 code=line,
@@ -278,28 +356,89 @@ class DPML_Type_Table(DPML_Type):
             }
             if parser.keyword in types:
                 node = types[parser.keyword](parser)
-                node.value = []
                 table.append(node)
             else:
                 raise Exception(f"Incorrect format or missing empty line after header: {self.code}")
-        # Remove whitespaces from all table rows
-        for l,line in enumerate(lines):
-            lines[l] = line.strip()
-            if line=='': del lines[l]
+        body = self._clean(body)
         # Read table and assign its values to the nodes
-        ncols = len(table)
-        csvtab = csv.reader(lines, delimiter=' ')
-        for row in csvtab:
-            if len(row)>ncols or len(row)<ncols:
-                raise Exception(f"Number of header nodes does not match number of table columns: {ncols} != {len(row)}")
-            for c in range(ncols):
-                table[c].value.append(row[c])
+        if '"' in body:   # quoted strings are read by the csv reader
+            columns = self._read_rows(body, table)
+        else:
+            columns = self._read_columns(body, table)
         # set additional node parameters
         nodes_new = []
-        for node in table:
+        for node, column in zip(table, columns):
+            node.value = column
             nvalues = len(node.value)
             node.dimension = [(nvalues,nvalues)]
             node.name = self.name + SGN_SEPARATOR + node.name
             node.indent = self.indent
             nodes_new.append(node)
         return nodes_new
+
+    # Split code into header lines and a table body separated by an empty line
+    def _split(self, code):
+        header, start = [], 0
+        while start<=len(code):
+            end = code.find("\n", start)
+            if end<0:
+                end = len(code)
+            line, start = code[start:end], end+1
+            if line.strip()=='':
+                break
+            header.append(line)
+        return header, code[start:]
+
+    # Remove whitespaces and empty lines from the table
+    def _clean(self, body):
+        body = body.strip()
+        if ' \n' in body or '\n ' in body or '\t' in body or '\r' in body:
+            body = RE_TABLE_SPACE.sub('', body)
+        if '\n\n' in body:
+            body = RE_TABLE_LINES.sub('\n', body)
+        return body
+
+    # Read table row by row, each cell becomes a string
+    def _read_rows(self, body, table):
+        ncols = len(table)
+        columns = [[] for node in table]
+        csvtab = csv.reader(body.split("\n") if body else [], delimiter=' ')
+        for row in csvtab:
+            if len(row)>ncols or len(row)<ncols:
+                raise Exception(f"Number of header nodes does not match number of table columns: {ncols} != {len(row)}")
+            for c in range(ncols):
+                columns[c].append(row[c])
+        return columns
+
+    # Read the whole table at once into typed arrays
+    def _read_columns(self, body, table):
+        ncols = len(table)
+        if not body:
+            return [np.array([], dtype=node.dtype) for node in table]
+        if body.count(' ')!=(ncols-1)*(body.count('\n')+1):
+            # rows with invalid number of cells are reported by the row reader
+            return self._read_rows(body, table)
+        numeric = [c for c,node in enumerate(table) if node.dtype in [int,float]]
+        strings = [c for c,node in enumerate(table) if node.dtype not in [int,float]]
+        kwargs = {'delimiter': ' ', 'comments': None}
+        columns = [None]*ncols
+        try:
+            if numeric:   # numerical columns are parsed directly
+                dtype = [(f"c{c}", table[c].dtype) for c in numeric]
+                data = np.loadtxt(io.StringIO(body), dtype=dtype, usecols=numeric, ndmin=1, **kwargs)
+                for c in numeric:
+                    columns[c] = data[f"c{c}"]
+            if strings:   # other columns are read as strings
+                data = np.loadtxt(io.StringIO(body), dtype=str, usecols=strings, ndmin=2, **kwargs)
+                for i,c in enumerate(strings):
+                    if table[c].dtype is str:
+                        # keep the string width of the longest value in the column
+                        width = max(1, np.char.str_len(data[:,i]).max())
+                        columns[c] = data[:,i].astype(f"U{width}")
+                    else:
+                        # non-empty strings are cast as true
+                        columns[c] = data[:,i]!=''
+        except ValueError:
+            # invalid rows and values are reported by the row reader
+            return self._read_rows(body, table)
+        return columns
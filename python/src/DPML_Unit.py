@@ -1,17 +1,44 @@
-from pydantic import BaseModel
-from typing import List
+class DPML_Unit:
+    __slots__ = (
+        'num',          # number value
+        'base',         # unit dimension exponents
+        'dfn',          # definition expression
+        'symbol',       # symbol
+        'symbol_base',  # symbol without prefix
+        'name',         # full name
+        'arbitrary',    # is unit arbitrary?
+    )
 
-class DPML_Unit(BaseModel):
-    num: float         # number value
-    base: List[int]    # unit dimension exponents
-    dfn: str = None    # definition expression
-    symbol: str = None # symbol
-    symbol_base: str = None  # symbol without prefix
-    name: str = None   # full name
-    arbitrary: bool = False  # is unit arbitrary?
+    def __init__(self, num, base, dfn=None, symbol=None, symbol_base=None,
+                 name=None, arbitrary=False):
+        self.num = float(num)
+        self.base = tuple(base)
+        self.dfn = dfn
+        self.symbol = symbol
+        self.symbol_base = symbol_base
+        self.name = name
+        self.arbitrary = arbitrary
 
-    def __init__(self, num, base, **kwargs):
-        kwargs['num'] = num
-        kwargs['base'] = base
-        super().__init__(**kwargs)
+    # Physical dimension without the power of ten exponent
+    @property
+    def dimension(self):
+        return self.base[:-1]
 
+    # Units are equal if they have the same magnitude and dimension
+    def __eq__(self, other):
+        if not isinstance(other, DPML_Unit):
+            return NotImplemented
+        return self.num==other.num and self.base==other.base
+
+    def __hash__(self):
+        return hash((self.num, self.base))
+
+    def __repr__(self):
+        return f"DPML_Unit({self.num!r}, {self.base!r}, symbol={self.symbol!r})"
+
+    # Copy of the unit with optionally changed attributes
+    def copy(self, **kwargs):
+        unit = DPML_Unit.__new__(DPML_Unit)
+        for attr in self.__slots__:
+            setattr(unit, attr, kwargs.get(attr, getattr(self, attr)))
+        return unit
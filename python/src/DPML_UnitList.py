@@ -100,20 +100,12 @@ DPML_UnitList_Prefixes = [
     (1.0,        [ 0, 0, 0, 0, 0, 0, 0, 0,-24], 'y',       '1e-24', 'yocto'), 
 ]
 
-def DPML_Convert_Arbitrary(value1, unit1, unit2):
-    conv = "_".join([unit1.symbol_base, unit2.symbol_base])
-    value2 = None
-    if conv=="Cel_K":
-        value1 *= unit1.num*10**unit1.base[-1]
-        value2 = (value1 + 273.15) / (unit2.num*10**unit2.base[-1])
-    elif conv=="K_Cel":
-        value1 *= unit1.num*10**unit1.base[-1]
-        value2 = (value1 - 273.15) / (unit2.num*10**unit2.base[-1])
-    if value2:
-        return value2
-    else:
-        raise Exception(f"No conversion of arbitrary unit '{unit1.symbol}' to '{unit2.symbol}' was found.")
-        
+# Offsets of arbitrary unit conversions
+DPML_UnitList_Offsets = {
+    "Cel_K":  273.15,
+    "K_Cel": -273.15,
+}
+
 DPML_UnitList_Arbitrary = [
     ([0,0,0,1,0,0,0,0,0], 'Cel', 'Degree Celsius'),
 ]
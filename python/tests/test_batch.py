@@ -0,0 +1,45 @@
+import sys, os
+import pytest
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(sys.path[0]),'src'))
+from DPML import *
+
+def write(path, code):
+    with open(path,'w') as f:
+        f.write(code)
+
+def test_batch(tmp_path):
+    material = str(tmp_path / 'material.dpml')
+    write(material, 'density float = 1 g/cm3')
+    filepaths = []
+    for i in range(4):
+        filepaths.append(str(tmp_path / f'run{i}.dpml'))
+        write(filepaths[-1], f'''
+gas {{{material}}}
+steps int = {i}
+        ''')
+    filepaths.append(str(tmp_path / 'invalid.dpml'))
+    write(filepaths[-1], 'steps int = abc')
+    results = DPML_Batch(workers=2, compile=True).parse(filepaths)
+    assert [r['filepath'] for r in results] == filepaths      # order of files is kept
+    for i in range(4):
+        assert results[i]['error'] is None
+        assert results[i]['data'] == {'gas.density': 1, 'steps': i}
+        assert results[i]['time'] > 0
+    assert results[4]['data'] is None
+    assert isinstance(results[4]['error'], Exception)
+    assert os.path.isfile(str(tmp_path / 'material.dpmlc'))   # imports are compiled for other workers
+    assert os.path.isfile(str(tmp_path / 'run0.dpmlc'))
+    results = DPML_Batch(workers=1).parse(filepaths[:2])
+    assert [r['data']['steps'] for r in results] == [0, 1]
+    
+if __name__ == "__main__":
+    # Specify wich test to run
+    test = sys.argv[1] if len(sys.argv)>1 else True
+
+    # Loop through all tests
+    for fn in dir(sys.modules[__name__]):
+        if fn[:5]=='test_' and (test is True or test==fn[5:]):
+            print(f"\nTesting: {fn}\n")
+            locals()[fn]()
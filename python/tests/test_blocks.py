@@ -44,6 +44,51 @@ intensity float W/m2
     })
 
     
+def test_table_columns():
+    data = parse('''
+columns table = """
+id int
+mass float g
+name str
+solid bool
+
+  1 2.5 iron 1
+  2 3e2 water 0
+
+  3 0.5 copper 1
+"""
+quoted table = """
+name str
+size int
+
+"big stone" 3
+sand 1
+"""
+    ''')
+    np.testing.assert_equal(data,{
+        'columns.id': np.array([1, 2, 3]),
+        'columns.mass': np.array([2.5, 300., 0.5]),
+        'columns.name': np.array(['iron', 'water', 'copper']),
+        'columns.solid': np.array([True, True, True]),
+        'quoted.name': np.array(['big stone', 'sand']),
+        'quoted.size': np.array([3, 1]),
+    })
+    # parsed columns are not copied again when casting
+    column = np.array([2.5, 300., 0.5])
+    node = DPML_Type_Float(name='mass', value=column, dimension=[(None,None)])
+    assert node.cast_value() is column
+    with pytest.raises(Exception) as e_info:
+        parse('''
+columns table = """
+id int
+mass float
+
+1 2.5
+2 3.5 4
+"""
+        ''')
+    assert e_info.value.args[0] == "Number of header nodes does not match number of table columns: 2 != 3"
+
 def test_inline_text():
     data = parse('''
 text str = """
@@ -54,7 +99,24 @@ block of text
     np.testing.assert_equal(data,{
         'text': '   tripple qotes # \' " \' "\nblock of text'
     })
-        
+
+def test_streaming(tmp_path):
+    filepath = str(tmp_path / 'stream.dpml')
+    rows = "\n".join([f"{i} {i/10}" for i in range(1000)])
+    with open(filepath,'w') as f:
+        f.write(f'name str = "stream"\ntab table = """\nn int\nx float cm\n\n{rows}\n"""\nlast int = 3\n')
+    with DPML() as p:
+        p.load(filepath, stream=True)
+        assert not isinstance(p.lines, list)       # lines are not read yet
+        p.initialize()
+        streamed = p.data()
+    with DPML() as p:
+        p.load(filepath)
+        p.initialize()
+        np.testing.assert_equal(streamed, p.data())
+    assert streamed['tab.x'][-1] == 99.9
+    assert streamed['last'] == 3
+    
 if __name__ == "__main__":
     # Specify wich test to run
     test = sys.argv[1] if len(sys.argv)>1 else True
@@ -0,0 +1,143 @@
+import sys, os
+import pytest
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(sys.path[0]),'src'))
+from DPML import *
+
+def parse(code):
+    with DPML(code) as p:
+        p.initialize()
+        p.display()
+        return p.data()
+
+def write(path, code):
+    with open(path,'w') as f:
+        f.write(code)
+    # make sure that the modification is visible even on coarse file systems
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns+1000000000))
+
+def test_single_parse():
+    DPML_Files.invalidate()
+    data = parse('''
+box {tests/blocks/nodes.dpml}
+bag {tests/blocks/nodes.dpml?vegies.*}
+bowl {tests/blocks/nodes.dpml?fruits}
+    ''')
+    assert data['box.vegies.potato'] == 200.0
+    assert data['bag.potato'] == 200.0
+    assert data['bowl.fruits'] == 0
+    stats = DPML_Files.stats()
+    assert stats['misses'] == 1      # file was parsed only once
+    assert stats['hits'] == 2
+
+def test_shared_imports():
+    DPML_Files.invalidate()
+    with DPML('''
+box {tests/blocks/nodes.dpml?vegies.*}
+basket.bag {tests/blocks/nodes.dpml?vegies.*}
+{tests/blocks/nodes.dpml?vegies.*}
+    ''') as p:
+        p.initialize()
+        assert p.data() == {'box.potato': 200.0, 'basket.bag.potato': 200.0, 'potato': 200.0}
+    entry = DPML_Files.cache.get(os.path.abspath('tests/blocks/nodes.dpml'))
+    assert list(entry['queries']) == ['vegies.*']   # one selection for all imports of the same query
+    selected = entry['queries']['vegies.*'][0]
+    assert selected.name == 'potato'                # aliases did not rename the shared selection
+    assert p.nodes['box.potato'].value_raw is selected.value_raw
+
+def test_modification(tmp_path):
+    DPML_Files.invalidate()
+    material = str(tmp_path / 'material.dpml')
+    setup = str(tmp_path / 'setup.dpml')
+    write(material, 'density float = 1 g/cm3')
+    write(setup, f'gas {{{material}}}')
+    code = f'density float = {{{setup}?gas.density}} g/cm3'
+    assert parse(code) == {'density': 1}
+    write(material, 'density float = 2 g/cm3')   # change of an imported file
+    assert parse(code) == {'density': 2}
+    assert DPML_Files.stats()['misses'] == 4
+
+def test_invalidate(tmp_path):
+    DPML_Files.invalidate()
+    material = str(tmp_path / 'material.dpml')
+    write(material, 'density float = 1 g/cm3')
+    parse(f'{{{material}}}')
+    parse(f'{{{material}}}')
+    assert DPML_Files.stats()['misses'] == 1
+    DPML_Files.invalidate(material)
+    parse(f'{{{material}}}')
+    assert DPML_Files.stats()['misses'] == 2
+
+def test_lru():
+    cache = DPML_LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1       # 'a' becomes most recently used
+    cache.set('c', 3)                # evicts 'b'
+    assert 'b' not in cache
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats() == {'hits': 3, 'misses': 0, 'size': 2, 'maxsize': 2}
+
+def test_compiled(tmp_path):
+    material = str(tmp_path / 'material.dpml')
+    setup = str(tmp_path / 'setup.dpml')
+    write(material, 'density float = 1 g/cm3')
+    write(str(tmp_path / 'sizes.txt'), '[1,2,3]')
+    np.save(tmp_path / 'grid.npy', np.ones((2,2)))
+    write(setup, f'''
+$unit inch = 2.54 cm
+gas {{{material}}}
+sizes int[3] = {{{tmp_path}/sizes.txt}}
+grid float[2][2] = {{{tmp_path}/grid.npy}}
+length float = 2 [inch]
+    = 2 [inch]
+    = 3 [inch]
+''')
+    def initialize(compiled=True):
+        DPML_Files.invalidate()
+        with DPML() as p:
+            p.load(setup)
+            p.initialize(compiled=compiled)
+            return p
+    p = initialize()
+    p.compile()
+    assert os.path.isfile(str(tmp_path / 'setup.dpmlc'))
+    initialize(compiled=False)
+    assert DPML_Files.stats()['misses'] == 1     # compiled files are used only on request
+    p = initialize()
+    assert DPML_Files.stats()['misses'] == 0     # compiled nodes were used
+    np.testing.assert_equal(p.data(), {
+        'gas.density': 1, 'sizes': np.array([1,2,3]), 'grid': np.ones((2,2)), 'length': 2,
+    })
+    assert isinstance(p.nodes['grid'].value, np.memmap)
+    assert p.nodes['length'].options == [None, 2, 3]
+    assert p.units[0].symbol == '[inch]'
+    write(material, 'density float = 1 g/cm3')   # same content with a new time stamp
+    initialize()
+    assert DPML_Files.stats()['misses'] == 0
+    np.save(tmp_path / 'grid.npy', np.ones((2,2)))  # binary files are checked only by stamps
+    p = initialize()
+    assert DPML_Files.stats()['misses'] == 1
+    p.compile()
+    write(str(tmp_path / 'sizes.txt'), '[4,5,6]')   # change of a dependency
+    p = initialize()
+    assert DPML_Files.stats()['misses'] == 1
+    np.testing.assert_equal(p.nodes['sizes'].value, np.array([4,5,6]))
+    with pytest.raises(Exception) as e_info:
+        with DPML('a int = 1') as p:
+            p.initialize()
+            p.compile()
+    assert e_info.value.args[0] == "Only nodes loaded from a single file can be compiled:"
+
+if __name__ == "__main__":
+    # Specify wich test to run
+    test = sys.argv[1] if len(sys.argv)>1 else True
+
+    # Loop through all tests
+    for fn in dir(sys.modules[__name__]):
+        if fn[:5]=='test_' and (test is True or test==fn[5:]):
+            print(f"\nTesting: {fn}\n")
+            locals()[fn]()
@@ -0,0 +1,60 @@
+import sys, os
+import json
+import pytest
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(sys.path[0]),'src'))
+from DPML_CLI import *
+
+def write(path, code):
+    with open(path,'w') as f:
+        f.write(code)
+
+def test_parse(tmp_path, capsys):
+    valid = str(tmp_path / 'valid.dpml')
+    invalid = str(tmp_path / 'invalid.dpml')
+    write(valid, 'size float = 3 cm')
+    write(invalid, 'size int = abc')
+    assert main(['parse', valid, '--workers', '1']) == 0
+    assert main(['parse', valid, invalid, '--workers', '1']) == 1
+    out, err = capsys.readouterr()
+    assert out.count(f"OK {valid}") == 2
+    assert err.startswith(f"ERROR {invalid}:")
+    # profiling parses files serially and cannot be combined with batch options
+    assert main(['parse', valid, '--profile']) == 0
+    capsys.readouterr()
+    assert main(['parse', valid, '--profile', '--workers', '2']) == 1
+    assert main(['parse', valid, '--profile', '--compile']) == 1
+    out, err = capsys.readouterr()
+    assert out == ''
+    assert err.count("ERROR: Option --profile cannot be combined") == 2
+
+def test_dump(tmp_path, capsys):
+    assert main(['dump', 'tests/blocks/nodes.dpml', '--nested']) == 0
+    out, err = capsys.readouterr()
+    assert json.loads(out) == {'fruits': 0, 'vegies': {'': 1, 'potato': 200.0}}
+    output = str(tmp_path / 'nodes.npz')
+    assert main(['dump', 'tests/blocks/nodes.dpml', '--format', 'npz', '--output', output]) == 0
+    data = np.load(output)
+    assert data['vegies.potato'] == 200.0
+    # profile is printed separately from the output
+    assert main(['dump', 'tests/blocks/nodes.dpml', '--profile']) == 0
+    out, err = capsys.readouterr()
+    assert json.loads(out)['vegies.potato'] == 200.0
+    assert "phase | lexing" in err
+    assert main(['dump', 'missing.dpml']) == 1
+
+def test_template(capsys):
+    assert main(['template', 'tests/blocks/nodes.dpml', 'potato: {{?vegies.potato}:.1f} g']) == 0
+    out, err = capsys.readouterr()
+    assert out == "potato: 200.0 g"
+
+if __name__ == "__main__":
+    # Specify wich test to run
+    test = sys.argv[1] if len(sys.argv)>1 else True
+
+    # Loop through all tests
+    for fn in dir(sys.modules[__name__]):
+        if fn[:5]=='test_' and (test is True or test==fn[5:]):
+            print(f"\nTesting: {fn}\n")
+            locals()[fn]()
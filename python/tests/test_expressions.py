@@ -103,7 +103,24 @@ def test_combination():
         && {?filled}
         || ~!{?color}
         """) == True
-        
+
+def test_compiled():
+    expr = '{?speed} > 30 km/h && ({?road} || false)'
+    assert DPML_Expression.compile(expr) is DPML_Expression.compile(expr)   # compiled only once
+    with DPML("speed float = 50 km/h\nroad bool = true") as p:
+        p.initialize()
+        assert p.expression(expr) == True
+    with DPML("speed float = 5 m/s\nroad bool = true") as p:
+        p.initialize()
+        assert p.expression(expr) == False    # evaluated with actual nodes
+    with DPML() as p:
+        with pytest.raises(Exception) as e_info:
+            p.expression('(true || false')
+        assert e_info.value.args[0] == "Unterminated parenthesis in expression:"
+        with pytest.raises(Exception) as e_info:
+            p.expression('true && (false) true')
+        assert e_info.value.args[0] == "Invalid expression:"
+
 if __name__ == "__main__":
     # Specify wich test to run
     test = sys.argv[1] if len(sys.argv)>1 else True
@@ -82,7 +82,61 @@ size = 25 cm
         ''')
     assert e_info.value.args[0] == "Value '25.0' of node 'size' doesn't match with any option:"
     assert e_info.value.args[1] == [None, 24.0, 2500.0]
-    
+
+def test_node_store():
+    code = "\n".join([f"node{i} int = {i}" for i in range(1000)])
+    code += "\n" + "\n".join([f"node{i} = {2*i}" for i in range(0,1000,2)])
+    with DPML(code) as p:
+        p.initialize()
+        assert len(p.nodes) == 1000
+        assert p.nodes.names()[:3] == ['node0', 'node1', 'node2']   # declaration order is kept
+        assert p.nodes['node998'].value == 1996                       # modified by name
+        assert p.nodes['node999'].value == 999
+        assert p.nodes.last().name == 'node999'
+        assert p.query('node10')[0].value == 20
+
+def test_node_copy():
+    with DPML('''
+size float = 2 cm
+  = 2 cm
+  = 3 cm
+    ''') as p:
+        p.initialize()
+        node = p.nodes['size']
+        assert not hasattr(node, '__dict__')          # nodes are slotted
+        copy = p.query('size')[0]
+        copy.name = 'box.size'
+        copy.options.append(4.0)
+        assert (copy.keyword, copy.value, copy.units) == ('float', 2.0, 'cm')
+        assert node.name == 'size'                    # copies do not modify the original
+        assert node.options == [None, 2.0, 3.0]
+
+def test_nested_data():
+    with DPML('''
+physics
+  gravity float = 9.81 m/s2
+  air
+    density float = 1.2 kg/m3
+steps int = 10
+steps.max int = 100
+    ''') as p:
+        p.initialize()
+        data = p.data(nested=True)
+        assert data == {
+            'physics': {'gravity': 9.81, 'air': {'density': 1.2}},
+            'steps': {'': 10, 'max': 100},   # node with subnodes keeps its value under an empty key
+        }
+        assert p.data(nested=True) is data             # cached until nodes change
+        p.use(p.nodes.index.values(), p.units)
+        assert p.data(nested=True) is not data
+        # lazy read-only view
+        assert p['physics']['gravity'] == 9.81
+        assert p['physics']['air']['density'] == 1.2
+        assert list(p['physics']) == ['gravity', 'air']
+        assert p['steps'][''] == 10
+        with pytest.raises(TypeError):
+            p['physics']['gravity'] = 10
+
 if __name__ == "__main__":
     # Specify wich test to run
     test = sys.argv[1] if len(sys.argv)>1 else True
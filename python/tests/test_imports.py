@@ -68,6 +68,61 @@ plate {?icecream.waffle}    # select specific node from current file
         'plate.waffle': 'standard',
     })
 
+def test_query_wildcard():
+    data = parse('''
+planets
+  earth
+    mass float = 5.97e24 kg
+    radius float = 6371 km
+  mars
+    radius float = 3389 km
+planets.earth.moon float = 7.35e22 kg
+planets.venus.mass float = 4.87e24 kg
+masses {?planets.*.mass}    # select nodes with the same name in all subnodes
+    ''')
+    assert list(data)[-2:] == ['masses.earth.mass', 'masses.venus.mass']   # declaration order
+    assert data['masses.venus.mass'] == 4.87e24
+    with DPML('''
+a.x int = 1
+b.y int = 2
+a.z int = 3
+    ''') as p:
+        p.initialize()
+        assert [node.name for node in p.query('a.*')] == ['x', 'z']
+        assert [node.name for node in p.query('*')] == ['a.x', 'b.y', 'a.z']
+        assert [node.name for node in p.query('*.y')] == ['b.y']
+
+def test_shared_values():
+    with DPML('''
+grid
+  x float[:] = [1,2,3] m
+  y float[:] = [4,5,6] m
+left {?grid.*}
+right {?grid.*}
+right.x = [10,20,30] cm    # modified node gets its own value
+left.y = [1,2,3] km
+    ''') as p:
+        p.initialize()
+        data = p.data()
+        assert np.shares_memory(data['grid.x'], data['left.x'])   # imported arrays are not copied
+        assert not np.shares_memory(data['grid.x'], data['right.x'])
+        np.testing.assert_equal(data['grid.x'], [1, 2, 3])
+        np.testing.assert_equal(data['right.x'], [0.1, 0.2, 0.3])
+        np.testing.assert_equal(data['grid.y'], [4, 5, 6])
+        np.testing.assert_equal(data['left.y'], [1000, 2000, 3000])
+
+def test_query_local_all():
+    # importing all local nodes moves them under the import name
+    data = parse('''
+g.b int[:] = [1,2]
+h1 {?*}
+g.b float = 3
+    ''')
+    np.testing.assert_equal(data,{
+        'h1.g.b': np.array([1,2]),
+        'g.b': 3.0,
+    })
+
 def test_value_local():
     data = parse('''
 size1 float = 34 cm       # standard definition
@@ -131,7 +186,76 @@ blocks                               # block imports into a group node
         'blocks.text2': 'This is a block text\nwith multiple lines\nthat will be loaded to a\nstring node.',
     })
 
-            
+def test_import_binary(tmp_path):
+    grid = np.arange(12, dtype=float).reshape(3,4)
+    np.save(tmp_path / 'grid.npy', grid)
+    np.arange(6, dtype=int).tofile(tmp_path / 'counts.raw')
+    with DPML(f'''
+grid float[3][4] = {{{tmp_path}/grid.npy}} m      # numpy array file
+counts int[:][2] = {{{tmp_path}/counts.raw}}       # raw binary file
+length float[3][4] = {{{tmp_path}/grid.npy}} m
+length = {{{tmp_path}/grid.npy}} cm
+    ''') as p:
+        p.initialize()
+        grid_node = p.nodes['grid']
+        assert isinstance(grid_node.value, np.memmap)          # array is not copied
+        assert not grid_node.value.flags.writeable
+        np.testing.assert_equal(grid_node.value, grid)
+        np.testing.assert_equal(p.nodes['counts'].value, np.arange(6).reshape(3,2))
+        np.testing.assert_almost_equal(p.nodes['length'].value, grid/100)
+    with pytest.raises(Exception) as e_info:
+        parse(f"grid int[3][4] = {{{tmp_path}/grid.npy}}")
+    assert e_info.value.args[0] == "Binary array of node 'grid' has invalid datatype:"
+    with pytest.raises(Exception) as e_info:
+        parse(f"grid float[12] = {{{tmp_path}/grid.npy}}")
+    assert e_info.value.args[0] == "Binary array of node 'grid' has invalid number of dimensions:"
+    with pytest.raises(Exception) as e_info:
+        parse(f"counts int[4][2] = {{{tmp_path}/counts.raw}}")
+    assert e_info.value.args[0] == "Raw binary file size does not match node dimensions:"
+    with pytest.raises(Exception) as e_info:
+        parse(f"grid float[3][5:] = {{{tmp_path}/grid.npy}}")
+    assert e_info.value.args[0] == "Node 'grid' has invalid dimension: dim(1)=4 < 5"
+
+def test_import_graph(tmp_path):
+    DPML_Files.invalidate()
+    files = {
+        'setup':    '{%(left)s}\n{%(right)s?*}',
+        'left':     'a {%(material)s}\n@case {%(material)s?density} > 0\n  b int = 1\n@end',
+        'right':    'c float = {%(material)s?density}',
+        'material': 'density float = 1 g/cm3',
+    }
+    paths = {name: str(tmp_path / f'{name}.dpml') for name in files}
+    for name, code in files.items():
+        with open(paths[name],'w') as f:
+            f.write(code%paths)
+    graph = DPML_ImportGraph(paths['setup'])
+    assert graph.order() == [paths[name] for name in ['material','left','right','setup']]
+    doc = graph.parse()
+    assert doc.data() == {'a.density': 1.0, 'b': 1, 'c': 1.0}
+    assert doc is not DPML_Files.request(paths['setup'])   # cached document is not shared
+    assert doc.nodes['c'] is not DPML_Files.request(paths['setup']).nodes['c']
+    assert DPML_Files.stats()['misses'] == 4   # every file was parsed only once
+    assert graph.dump().count(paths['material']) == 2
+    # circular imports are reported with the import chain
+    with open(paths['material'],'w') as f:
+        f.write('{%(setup)s}'%paths)
+    chain = " -> ".join(paths[name] for name in ['setup','left','material','setup'])
+    with pytest.raises(Exception) as e_info:
+        DPML_ImportGraph(paths['setup']).order()
+    assert e_info.value.args == ("Circular import:", chain)
+    # the graph is optional, loading of files reports the same import chain
+    DPML_Files.invalidate()
+    with pytest.raises(Exception) as e_info:
+        DPML_Files.request(paths['setup'])
+    assert e_info.value.args == ("Circular import:", chain)
+    DPML_Files.invalidate()
+    with pytest.raises(Exception) as e_info:
+        with DPML() as p:
+            p.load(paths['setup'])
+            p.initialize()
+    assert e_info.value.args == ("Circular import:", chain)
+    assert DPML_Files.parsing == []
+
 if __name__ == "__main__":
     # Specify wich test to run
     test = sys.argv[1] if len(sys.argv)>1 else True
@@ -0,0 +1,77 @@
+import sys, os
+import pytest
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(sys.path[0]),'src'))
+from DPML import *
+
+def write(path, code):
+    with open(path,'w') as f:
+        f.write(code)
+    # make sure that the modification is visible even on coarse file systems
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns+1000000000))
+
+def test_update():
+    code = '''
+count int = 1
+length float = {?count} m
+@case {?count} == 1
+  shape str = line
+@else
+  shape str = square
+@end
+colors int = 3
+  = 3
+  = 4
+'''
+    with DPML(code) as p:
+        p.initialize(incremental=True)
+        # value set by the user changes dependent nodes and conditions
+        p.update(values={'count': 2})
+        np.testing.assert_equal(p.data(),{
+            'count': 2, 'length': 2.0, 'shape': 'square', 'colors': 3,
+        })
+        assert p.incremental.executed < len(p.incremental.statements)
+        # modified code is parsed only partially
+        p.update(code=code.replace('colors int = 3','colors int = 4'))
+        np.testing.assert_equal(p.data(),{
+            'count': 2, 'length': 2.0, 'shape': 'square', 'colors': 4,
+        })
+        assert p.incremental.executed == 3
+        # nothing changed
+        p.update()
+        assert p.incremental.executed == 0
+    with DPML(code) as p:
+        p.initialize()
+        with pytest.raises(Exception) as e_info:
+            p.update()
+        assert e_info.value.args[0] == "Nodes were not initialized incrementally"
+
+def test_update_files(tmp_path):
+    DPML_Files.invalidate()
+    material = str(tmp_path / 'material.dpml')
+    setup = str(tmp_path / 'setup.dpml')
+    write(material, 'density float = 1 g/cm3')
+    write(setup, f'gas {{{material}}}\nsize float = 3 cm')
+    with DPML() as p:
+        p.load(setup)
+        p.initialize(incremental=True)
+        write(setup, f'gas {{{material}}}\nsize float = 4 cm')
+        p.update()
+        assert p.data() == {'gas.density': 1.0, 'size': 4.0}
+        assert DPML_Files.stats()['misses'] == 1   # imported file was not requested again
+        write(material, 'density float = 2 g/cm3')
+        p.update()
+        assert p.data() == {'gas.density': 2.0, 'size': 4.0}
+        assert p.incremental.executed == 1
+
+if __name__ == "__main__":
+    # Specify wich test to run
+    test = sys.argv[1] if len(sys.argv)>1 else True
+
+    # Loop through all tests
+    for fn in dir(sys.modules[__name__]):
+        if fn[:5]=='test_' and (test is True or test==fn[5:]):
+            print(f"\nTesting: {fn}\n")
+            locals()[fn]()
@@ -0,0 +1,46 @@
+import sys, os
+import pytest
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(sys.path[0]),'src'))
+from DPML import *
+
+FIELDS = ['keyword','name','value_raw','units','indent','code','isimport','defined','dimension','source']
+
+def lex(parser, code):
+    try:
+        node = parser(code)
+        return (type(node).__name__,) + tuple(getattr(node, field) for field in FIELDS)
+    except Exception as e:
+        return ('error', e.args)
+
+def test_step_parser():
+    # lexer has to classify lines exactly as the step parser does
+    lines = [
+        '', '   ', '# comment', '  #', '#',
+        'name', 'name  # group comment', 'name#comment', 'wrong$name int = 3',
+        'size float = 34 cm  # comment', 'size float! = none', 'size = 3 m', 'size= 3',
+        'counts int[2:][3][:] = [[1,2,3],[4,5,6]]', 'counts int[1:2:3] = [1]',
+        'name str = "Johannes Brahms"', "name str = 'it''s'", 'name str = """block$@02text"""',
+        'name string = a', 'name str = {}', "text str = '{a,b}'", 'size2 float = {?size1} m',
+        '  = 12 cm  # option', '=', '  = {?a}',
+        '{tests/blocks/nodes.dpml}', 'bag {file.dpml?*}  # import', 'bag{file.dpml}', 'a {b} c', '{a?b?c}',
+        '$unit length = 1 cm', '$unit', '@case {?a} == 3 && true # c', '@case """\n(true)\n"""',
+        'plant.@case false', '@case', '@case   # empty', '@else', 'plant.@end  # c', '@endless',
+        'x = 3 cm int = 4', 'tab\tint = 3',
+    ]
+    lexer = DPML_Lexer('test')
+    for code in lines:
+        step = lambda code: DPML_Node(code=code, line=1, source='test').determine_type()
+        fast = lambda code: lexer.node(code, 1)
+        assert lex(step, code) == lex(fast, code), code
+
+if __name__ == "__main__":
+    # Specify wich test to run
+    test = sys.argv[1] if len(sys.argv)>1 else True
+
+    # Loop through all tests
+    for fn in dir(sys.modules[__name__]):
+        if fn[:5]=='test_' and (test is True or test==fn[5:]):
+            print(f"\nTesting: {fn}\n")
+            locals()[fn]()
@@ -0,0 +1,89 @@
+import sys, os
+import time
+import pytest
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(sys.path[0]),'src'))
+sys.path.append(os.path.join(os.path.dirname(sys.path[0]),'benchmarks'))
+from DPML import *
+
+def generate(size):
+    lines = []
+    for i in range(size):
+        lines.append(f"group{i}")
+        lines.append(f"  node int = {i}")
+        lines.append(f"  alias {{?group{i}.node}}")   # import spliced into the queue
+        lines.append(f"group{i}.node = {i+1}")        # modification of an existing node
+    return "\n".join(lines)
+
+def measure(size, repeat=3):
+    code = generate(size)
+    times = []
+    for r in range(repeat):
+        start = time.perf_counter()
+        with DPML(code) as p:
+            p.initialize()
+        times.append(time.perf_counter()-start)
+        assert len(p.nodes) == 2*size
+    return min(times)
+
+# Timing comparisons are unreliable on loaded machines, they run only on request
+@pytest.mark.skipif(not os.environ.get('DPML_TIMING'), reason="set DPML_TIMING=1 to compare timings")
+def test_linear_initialize():
+    # quadruple input should take roughly four times longer, quadratic parsing would take sixteen times longer
+    small = measure(125)
+    large = measure(500)
+    print(f"Initialize: {small:.3f}s (small) {large:.3f}s (large) ratio {large/small:.2f}")
+    assert large/small < 8
+
+def test_profile():
+    DPML_Files.invalidate()
+    with DPML('''
+box {tests/blocks/nodes.dpml}
+bag {tests/blocks/nodes.dpml?vegies.*}
+size float = 3 cm
+size = 4 mm
+@case {?size} > 1 mm
+  color str = red
+@end
+    ''') as p:
+        p.initialize(profile=True)
+        report = p.report.data()
+        assert report['phases']['imports']['count'] == 2
+        assert report['phases']['conditions']['count'] == 2
+        assert report['phases']['modify']['count'] == 1
+        assert report['phases']['units']['count'] == 2   # modification and condition
+        assert report['keywords']['float']['count'] == 4  # including imported nodes and the imported file
+        assert report['keywords']['str']['count'] == 1
+        path = os.path.abspath('tests/blocks/nodes.dpml')
+        assert report['files'][path]['count'] == 2      # file requested twice, but parsed once
+        assert report['total'] >= report['phases']['imports']['time']
+    assert DPML_Profile.report is None                  # profiling is disabled again
+    # incremental initialization is profiled including lexing and can be updated later
+    with DPML('size float = 3 cm\nsize = 4 mm') as p:
+        p.initialize(incremental=True, profile=True)
+        report = p.report.data()
+        assert p.incremental is not None
+        assert report['phases']['lexing']['count'] == 2
+        assert report['phases']['modify']['count'] == 1
+        p.update()
+        assert p.incremental.executed == 0
+
+def test_benchmark():
+    from benchmark import run
+    results = run({'nodes': 50, 'imports': 2, 'rows': 10, 'length': 5}, repeat=1)
+    assert set(results) == {
+        'initialize', 'expression', 'convert_scalar', 'convert_array', 'table',
+        'query_subtree', 'query_segment', 'query_node', 'template',
+    }
+    assert all(result['min']>0 for result in results.values())
+
+if __name__ == "__main__":
+    # Specify wich test to run
+    test = sys.argv[1] if len(sys.argv)>1 else True
+
+    # Loop through all tests
+    for fn in dir(sys.modules[__name__]):
+        if fn[:5]=='test_' and (test is True or test==fn[5:]):
+            print(f"\nTesting: {fn}\n")
+            locals()[fn]()
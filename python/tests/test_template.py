@@ -33,6 +33,29 @@ Height: 177.0
 Age:    30
 Gender: woman
         """
+
+def test_compiled(tmp_path):
+    template = str(tmp_path / 'deck.tpl')
+    output = str(tmp_path / 'deck.txt')
+    with open(template,'w') as f:
+        f.write("mass = {{?mass}:.1f} ({{?mass}})")
+    results = []
+    for mass in [1, 2]:
+        with DPML(f"mass float = {mass} kg") as p:
+            p.initialize()
+            results.append(p.template(template, output))
+    assert results == ["mass = 1.0 (1.0)", "mass = 2.0 (2.0)"]
+    with open(template) as f:
+        assert f.read() == "mass = {{?mass}:.1f} ({{?mass}})"   # template is not overwritten
+    with open(output) as f:
+        assert f.read() == "mass = 2.0 (2.0)"
+    code = "mass = {{?mass}:.1f} ({{?mass}})"
+    assert DPML_Template.compile(code) is DPML_Template.compile(code)   # compiled only once
+    with DPML("mass float = 3 kg") as p, open(output,'w') as f:
+        p.initialize()
+        p.template(template, f)                                # streamed into a file object
+    with open(output) as f:
+        assert f.read() == "mass = 3.0 (3.0)"
         
 if __name__ == "__main__":
     # Specify wich test to run
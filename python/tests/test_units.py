@@ -29,6 +29,36 @@ def test_declaration():
         """)
     assert e_info.value.args[0] == "Following unit already exits:"
 
+def test_registry():
+    with DPML_Converter() as p:
+        unit = p.expression('m')                   # returned units are private copies
+        unit.symbol = 'meter'
+        assert p.units['m'].symbol == 'm'
+        assert p.expression('m').symbol == 'm'     # cached expression was not modified
+        assert p.expression('m') is not p.expression('m')
+        assert p.units is DPML_Registry.units      # registry is shared between converters
+    custom = DPML_Unit(1.0, [1,0,0,0,0,0,0,0,0], symbol='[foot]')
+    with DPML_Converter([custom]) as p:
+        assert p.units['[foot]'] is custom         # custom units overlay the registry
+        assert p.units['m'] is DPML_Registry.units['m']
+    assert '[foot]' not in DPML_Registry.units
+    with pytest.raises(Exception) as e_info:
+        DPML_Converter([DPML_Unit(1.0, [0]*9, symbol='m')])
+    assert e_info.value.args[0] == "Following unit already exits:"
+
+def test_hashable():
+    with DPML_Converter() as p:
+        unit1 = p.expression('kg*m/s2')
+        unit2 = p.expression('N')
+        assert unit1 == unit2
+        assert {unit1: 'force'}[unit2] == 'force'      # units can be used as dictionary keys
+        assert unit1.dimension == p.expression('g*cm/s2').dimension
+        assert unit1.dimension != p.expression('J').dimension
+        assert not hasattr(unit1, '__dict__')
+        unit3 = p.multiply(unit1, p.expression('m'))
+        assert unit1 == unit2                          # arithmetic does not modify operands
+        assert p.equal(unit3, p.expression('J'))
+
 def test_base():
     with DPML_Converter() as p:
         # Closure of base units
@@ -146,6 +176,49 @@ def test_convert():
                 print(f"Value 2 expected:  {value2} {expr2}")
             assert equal
             
+def test_cache():
+    DPML_Converter.expressions.clear()
+    DPML_Converter.conversions.clear()
+    with DPML_Converter() as p:
+        for i in range(3):
+            assert isclose(p.convert(2, 'km', 'cm'), 2e5, rel_tol=1e-6)
+            assert isclose(p.convert(273.15, 'K', 'Cel'), 0, abs_tol=1e-9)
+        stats = p.cache_stats()
+        assert stats['conversions']['misses'] == 2   # conversion factors are computed only once
+        assert stats['conversions']['hits'] == 4
+        assert stats['expressions']['misses'] == 4   # every unit expression is parsed only once
+    custom = DPML_Unit(2.0, [1,0,0,0,0,0,0,0,0], symbol='[step]')
+    with DPML_Converter([custom]) as p:              # custom units have separate cache entries
+        assert isclose(p.convert(3, '[step]', 'm'), 6, rel_tol=1e-6)
+        assert p.cache_stats()['conversions']['misses'] == 3
+
+def test_arrays():
+    with DPML_Converter() as p:
+        value = np.array([1.0, 2.0, 3.0])
+        conv = p.convert(value, 'km', 'm', inplace=True)
+        assert conv is value                                      # float arrays are converted in place
+        np.testing.assert_allclose(value, [1e3, 2e3, 3e3])
+        value = np.array([0.0, 100.0])
+        conv = p.convert(value, 'Cel', 'K')                       # affine conversion without modifying input
+        np.testing.assert_allclose(conv, [273.15, 373.15])
+        np.testing.assert_equal(value, [0.0, 100.0])
+        conv = p.convert(np.array([1, 2]), 'm', 'cm', inplace=True)  # integers are converted into a new array
+        np.testing.assert_allclose(conv, [100.0, 200.0])
+    data = parse("""
+    sizes float[3] = [1,2,3] m
+    sizes = [100,200,300] cm
+    temps float[2] = [0,100] Cel
+    temps = [273.15,373.15] K
+    """)
+    np.testing.assert_allclose(data['sizes'], [1, 2, 3])
+    np.testing.assert_allclose(data['temps'], [0, 100], atol=1e-9)
+    with DPML("sizes float[3] = [1,2,3] m") as p:
+        p.initialize()
+        assert p.expression('{?sizes} == [100,200,300] cm') == True
+        assert p.expression('{?sizes} < [2,3,4] m') == True
+        assert p.expression('{?sizes} > [0,3,0] m') == False
+        np.testing.assert_equal(p.data()['sizes'], [1, 2, 3])    # comparison does not modify nodes
+
 if __name__ == "__main__":
     # Specify wich test to run
     test = sys.argv[1] if len(sys.argv)>1 else True